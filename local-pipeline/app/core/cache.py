@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class SqliteCache:
+    """Small persistent key/value cache backed by a local SQLite file.
+
+    - Values are strings (callers serialize, e.g. `model_dump_json()`).
+    - Optional per-entry expiry (seconds); expired entries read as misses.
+    - Safe to share across threads (one connection guarded by a lock).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            "create table if not exists cache (key text primary key, value text not null, expires_at real null)"
+        )
+        # Keep the file from growing forever across runs.
+        self._conn.execute("delete from cache where expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("select value, expires_at from cache where key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str, *, expire: float | None = None) -> None:
+        expires_at = time.time() + expire if expire is not None else None
+        with self._lock:
+            self._conn.execute(
+                "insert or replace into cache (key, value, expires_at) values (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -59,6 +59,20 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("OPENAI_CHAT_MODEL", "OPENAI_SUMMARY_MODEL"),
     )
     llm_temperature: float = Field(default=0.1, alias="LLM_TEMPERATURE")
+    # Schema-constrained (json_schema) extraction replies. A model that rejects json_schema is
+    # detected on the first call (logged at error level) and the run falls back to json_object.
+    openai_structured_outputs: bool = Field(default=True, alias="OPENAI_STRUCTURED_OUTPUTS")
+    # Max in-flight chat completions per extraction pass.
+    llm_concurrency: int = Field(default=4, alias="LLM_CONCURRENCY")
+    # Proactive OpenAI budget shared by all chat calls (0 disables). Set to the account's
+    # limits for the model; each call also reserves `openai_completion_tokens` for the reply.
+    openai_requests_per_minute: int = Field(default=0, alias="OPENAI_RPM")
+    openai_tokens_per_minute: int = Field(default=0, alias="OPENAI_TPM")
+    openai_completion_tokens: int = Field(default=1000, alias="OPENAI_COMPLETION_TOKENS")
+    # Run chunk extraction through the OpenAI Batch API (half price, up to 24h turnaround)
+    # before processing; whatever does not come back in time uses the realtime path.
+    openai_batch_api: bool = Field(default=False, alias="OPENAI_BATCH_API")
+    openai_batch_timeout_seconds: int = Field(default=6 * 3600, alias="OPENAI_BATCH_TIMEOUT_SECONDS")
 
     # Embeddings config
     hf_embedding_model: str = Field(
@@ -70,6 +84,16 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("EMBEDDING_MAX_LENGTH", "QWEN_EMBED_MAX_TOKENS"),
     )
     embedding_device: str = Field(default="auto", alias="EMBEDDING_DEVICE")
+    # OpenAI-compatible embedding server (Infinity: http://host:7997, TEI: http://host:8080/v1)
+    # serving `hf_embedding_model`. Empty runs the model in-process.
+    embedding_server_url: str = Field(default="", alias="EMBEDDING_SERVER_URL")
+    embedding_batch_size: int = Field(default=16, alias="EMBEDDING_BATCH_SIZE")
+    # Per-video summary embeddings reuse the vector of a recently embedded summary whose 64-bit
+    # SimHash is within this many bits (0 disables; ~3 catches whitespace/filler-word edits only).
+    # Chunk embeddings for the semantic cache never reuse, so its cosine threshold still applies.
+    embedding_near_duplicate_bits: int = Field(default=0, alias="EMBEDDING_NEAR_DUPLICATE_BITS")
+    # Send embeddings as half-precision (4 significant digit) pgvector literals.
+    embedding_store_half: bool = Field(default=False, alias="EMBEDDING_STORE_HALF")
 
     # YouTube discovery config
     discovery_lookback_hours: int = Field(default=36, alias="DISCOVERY_LOOKBACK_HOURS")
@@ -87,6 +111,28 @@ class Settings(BaseSettings):
     pipeline_region_code: str = Field(default="US", alias="PIPELINE_REGION_CODE")
     pipeline_min_duration_seconds: int = Field(default=2 * 60, alias="PIPELINE_MIN_DURATION_SECONDS")
     pipeline_max_duration_seconds: int = Field(default=60 * 60, alias="PIPELINE_MAX_DURATION_SECONDS")
+    # Videos processed concurrently (each still fans out up to LLM_CONCURRENCY requests).
+    pipeline_video_concurrency: int = Field(default=3, alias="PIPELINE_VIDEO_CONCURRENCY")
+    # Worker threads for the transcript prefetch. Fetch starts are still spaced by the
+    # service's global throttle; extra workers only overlap slow responses.
+    transcript_fetch_concurrency: int = Field(default=8, alias="TRANSCRIPT_FETCH_CONCURRENCY")
+
+    # Persistent local cache (SQLite file) for LLM extractions and YouTube channel stats.
+    # Empty string disables it.
+    cache_path: str = Field(
+        default=str(Path(__file__).resolve().parents[2] / ".cache" / "pipeline_cache.sqlite"),
+        alias="PIPELINE_CACHE_PATH",
+    )
+
+    # Reuse an extraction for chunks whose embedding has cosine >= threshold with an
+    # already-extracted chunk (0 disables). Mean-pooled embeddings of unrelated transcript
+    # text already score high, and only the first `embedding_max_length` tokens are embedded,
+    # so only enable with a threshold tuned for the model (~0.97+).
+    semantic_cache_threshold: float = Field(default=0.0, alias="SEMANTIC_CACHE_THRESHOLD")
+
+    # Skip LLM extraction for chunks that mention no term from this file (one ticker, company
+    # name or macro keyword per line; include MARKET-style terms like CPI/FOMC). Empty disables.
+    ticker_universe_path: str = Field(default="", alias="TICKER_UNIVERSE_PATH")
 
     # Chunking
     chunk_window_seconds: int = Field(default=300, alias="CHUNK_WINDOW_SECONDS")
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import os
 import sys
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 
@@ -35,6 +36,24 @@ def configure_logging(level: Optional[str] = None) -> None:
         logging.getLogger(noisy).setLevel(logging.WARNING)
 
 
+@lru_cache(maxsize=None)
+def load_encoding(model: str | None) -> Any:
+    """tiktoken encoding for the model (cl100k_base if unknown), or None without tiktoken.
+
+    Cached per model name; shared by prompt stats, prompt trimming and rate limiting.
+    """
+
+    try:
+        import tiktoken  # type: ignore
+
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except Exception:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
 def log_llm_prompt_stats(
     logger: logging.Logger,
     *,
@@ -59,16 +78,12 @@ def log_llm_prompt_stats(
     approx_tokens = (chars + 3) // 4
 
     tokens: int | None = None
-    try:
-        import tiktoken  # type: ignore
-
+    enc = load_encoding(model)
+    if enc is not None:
         try:
-            enc = tiktoken.encoding_for_model(model or "")
+            tokens = len(enc.encode(prompt))
         except Exception:
-            enc = tiktoken.get_encoding("cl100k_base")
-        tokens = len(enc.encode(prompt))
-    except Exception:
-        tokens = None
+            tokens = None
 
     payload: Dict[str, Any] = {
         "label": label,
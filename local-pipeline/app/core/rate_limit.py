@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any
+
+from app.core.logging import load_encoding
+
+
+class RateLimiter:
+    """Proactive RPM/TPM limiter for chat completions (token buckets, shared across threads).
+
+    - Each call reserves one request and its estimated tokens up front (prompt tokens plus
+      `completion_tokens`), then sleeps until the buckets cover the reservation. Later
+      callers queue behind earlier reservations, so bursts are paced instead of 429'd.
+    - Buckets refill continuously at `per_minute / 60` per second and hold at most one
+      minute of budget. A limit of 0 disables that bucket.
+    - Prompt tokens use tiktoken when installed, else the ~4 chars/token heuristic.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        model: str | None = None,
+        completion_tokens: int = 0,
+    ) -> None:
+        self._rpm = max(0, int(requests_per_minute))
+        self._tpm = max(0, int(tokens_per_minute))
+        self._completion_tokens = max(0, int(completion_tokens))
+        self._encoding = load_encoding(model) if self._tpm else None
+
+        self._lock = threading.Lock()
+        self._requests = float(self._rpm)
+        self._tokens = float(self._tpm)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._rpm or self._tpm)
+
+    def acquire(self, prompt: str = "") -> None:
+        wait = self._reserve(prompt)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, prompt: str = "") -> None:
+        wait = self._reserve(prompt)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def estimate_tokens(self, prompt: str) -> int:
+        prompt = prompt or ""
+        if self._encoding is not None:
+            try:
+                return len(self._encoding.encode(prompt)) + self._completion_tokens
+            except Exception:
+                pass
+        return (len(prompt) + 3) // 4 + self._completion_tokens
+
+    def _reserve(self, prompt: str) -> float:
+        """Take this call's share out of the buckets; returns seconds to wait before sending."""
+
+        # Estimated outside the lock: tokenizing a long prompt should not stall other callers.
+        tokens = self.estimate_tokens(prompt) if self._tpm else 0
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+
+            wait = 0.0
+            if self._rpm:
+                self._requests = min(float(self._rpm), self._requests + elapsed * self._rpm / 60.0) - 1.0
+                if self._requests < 0:
+                    wait = -self._requests * 60.0 / self._rpm
+            if self._tpm:
+                # A single prompt larger than the whole bucket still has to go through eventually.
+                cost = min(tokens, self._tpm)
+                self._tokens = min(float(self._tpm), self._tokens + elapsed * self._tpm / 60.0) - cost
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens * 60.0 / self._tpm)
+            return wait
+
+
+def rate_limited(llm: Any, limiter: RateLimiter | None) -> Any:
+    """Wrap a LangChain runnable so every invoke/batch input first acquires from `limiter`.
+
+    One reservation per prompt (batches are fanned out per input by `Runnable.batch`), so
+    concurrent callers across services draw on the same account budget.
+    """
+
+    if limiter is None or not limiter.enabled:
+        return llm
+
+    from langchain_core.runnables import RunnableLambda
+
+    def _call(prompt: Any) -> Any:
+        limiter.acquire(str(prompt))
+        return llm.invoke(prompt)
+
+    async def _acall(prompt: Any) -> Any:
+        await limiter.aacquire(str(prompt))
+        return await llm.ainvoke(prompt)
+
+    return RunnableLambda(_call, afunc=_acall)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticCache:
+    """In-memory near-duplicate cache keyed by embedding vectors.
+
+    - `lookup(vector)` returns the value stored for the most similar vector when its
+      cosine similarity is at least `threshold`, else None.
+    - Vectors are L2-normalized on insert/lookup, so similarity is a dot product.
+    - Brute force over a (N, D) float32 matrix; fine for the few thousand chunks of a run.
+    """
+
+    def __init__(self, *, threshold: float) -> None:
+        self._threshold = float(threshold)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._values: List[Any] = []
+
+    @property
+    def threshold(self) -> float:
+        return self._threshold
+
+    def __len__(self) -> int:
+        return self._size
+
+    def lookup(self, vector: Sequence[float]) -> Any | None:
+        if self._matrix is None or self._size == 0:
+            return None
+        v = self._normalize(vector)
+        sims = self._matrix[: self._size] @ v
+        best = int(np.argmax(sims))
+        if sims[best] >= self._threshold:
+            return self._values[best]
+        return None
+
+    def add(self, vector: Sequence[float], value: Any) -> None:
+        v = self._normalize(vector)
+        if self._matrix is None:
+            self._matrix = np.empty((64, v.shape[0]), dtype=np.float32)
+        elif self._size == self._matrix.shape[0]:
+            # Grow geometrically so appends stay amortized O(D).
+            grown = np.empty((self._size * 2, self._matrix.shape[1]), dtype=np.float32)
+            grown[: self._size] = self._matrix
+            self._matrix = grown
+        self._matrix[self._size] = v
+        self._values.append(value)
+        self._size += 1
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 1e-12 else v
@@ -146,6 +146,11 @@ create index if not exists idx_video_summaries_video_id on public.video_summarie
 create index if not exists idx_video_summary_embeddings_video_id on public.video_summary_embeddings(video_id);
 create index if not exists idx_daily_summaries_market_date on public.daily_summaries(market_date);
 
+-- Optional: halve stored size/index memory with pgvector >= 0.7 half-precision vectors
+-- (pair with EMBEDDING_STORE_HALF=true; queries must cast the probe to halfvec as well).
+-- alter table public.embeddings alter column embedding type halfvec using embedding::halfvec;
+-- alter table public.video_summary_embeddings alter column embedding type halfvec using embedding::halfvec;
+
 -- Vector index for semantic search (choose one)
 -- HNSW is recommended when available.
 -- If your Supabase project doesn't support HNSW, use IVFFLAT.
@@ -14,8 +14,9 @@ logger = logging.getLogger(__name__)
 class SupabaseDB:
     """Thin DB wrapper for idempotent inserts and lookups."""
 
-    def __init__(self, *, url: str, service_key: str) -> None:
+    def __init__(self, *, url: str, service_key: str, half_precision_embeddings: bool = False) -> None:
         self._client: Client = create_client(url, service_key)
+        self._half_precision_embeddings = half_precision_embeddings
 
     @property
     def client(self) -> Client:
@@ -34,9 +35,30 @@ class SupabaseDB:
             return False
         return rows[0].get("summarized_at") is not None
 
+    def get_processed_video_ids(self, video_ids: list[str]) -> set[str]:
+        """Batch variant of `is_video_processed`: one query for many ids."""
+
+        if not video_ids:
+            return set()
+        resp = (
+            self._client.table("video_summaries")
+            .select("video_id, summarized_at")
+            .in_("video_id", list(video_ids))
+            .execute()
+        )
+        return {
+            str(row["video_id"])
+            for row in (resp.data or [])
+            if row.get("video_id") and row.get("summarized_at") is not None
+        }
+
     def upsert_video(self, video: VideoMetadata) -> None:
+        self._client.table("videos").upsert(self._video_payload(video)).execute()
+
+    @staticmethod
+    def _video_payload(video: VideoMetadata) -> dict[str, Any]:
         title = video.title.replace("&#39;", "'")
-        payload = {
+        return {
             "video_id": video.video_id,
             "title": title,
             "channel": video.channel,
@@ -56,13 +78,20 @@ class SupabaseDB:
             "channel_video_count": video.channel_video_count,
             "discovered_at": datetime.now(timezone.utc).isoformat(),
         }
-        self._client.table("videos").upsert(payload).execute()
 
     def mark_video_processed(self, video_id: str) -> None:
         self._client.table("videos").update({"processed_at": datetime.now(timezone.utc).isoformat()}).eq(
             "video_id", video_id
         ).execute()
 
+    def mark_videos_processed(self, video_ids: list[str], *, processed_at: datetime | None = None) -> None:
+        """Bulk variant of `mark_video_processed`: one update, one shared timestamp."""
+
+        if not video_ids:
+            return
+        stamp = (processed_at or datetime.now(timezone.utc)).isoformat()
+        self._client.table("videos").update({"processed_at": stamp}).in_("video_id", list(video_ids)).execute()
+
     def upsert_transcript_chunks(self, chunks: list[TranscriptChunk]) -> None:
         if not chunks:
             return
@@ -103,6 +132,17 @@ class SupabaseDB:
             on_conflict="video_id,chunk_index,ticker",
         ).execute()
 
+    def upsert_chunk_analyses(self, rows: list[dict[str, Any]]) -> None:
+        """Bulk variant of `upsert_chunk_analysis`: one request for all (chunk, ticker) rows."""
+
+        if not rows:
+            return
+
+        self._client.table("chunk_analysis").upsert(
+            rows,
+            on_conflict="video_id,chunk_index,ticker",
+        ).execute()
+
     def list_chunk_analysis(self, video_id: str) -> list[dict[str, Any]]:
         resp = self._client.table("chunk_analysis").select("*").eq("video_id", video_id).execute()
         return resp.data or []
@@ -162,6 +202,39 @@ class SupabaseDB:
 
         return int(rows[0]["id"])
 
+    def upsert_aggregated_summaries(
+        self,
+        *,
+        video_id: str,
+        published_at: datetime | None = None,
+        summaries: dict[str, dict[str, Any]],
+    ) -> None:
+        """Bulk variant of `upsert_aggregated_summary` for every ticker of one video."""
+
+        if not summaries:
+            return
+
+        published = published_at.isoformat() if published_at else None
+        payload: list[dict[str, Any]] = []
+        for ticker, aggregated_summary in summaries.items():
+            row: dict[str, Any] = {"video_id": video_id, "ticker": ticker, "summary": aggregated_summary}
+            # PostgREST bulk upserts need uniform keys; only include published_at when known.
+            if published is not None:
+                row["published_at"] = published
+            payload.append(row)
+
+        try:
+            self._client.table("summaries").upsert(payload, on_conflict="video_id,ticker").execute()
+        except Exception as exc:
+            # Backward compatibility: older schemas may not have published_at.
+            msg = str(exc)
+            if "published_at" in msg and ("does not exist" in msg or "column" in msg):
+                for row in payload:
+                    row.pop("published_at", None)
+                self._client.table("summaries").upsert(payload, on_conflict="video_id,ticker").execute()
+            else:
+                raise
+
     def upsert_embedding(
         self,
         *,
@@ -177,7 +250,7 @@ class SupabaseDB:
             "summary_id": summary_id,
             "model": model,
             "dimension": dimension,
-            "embedding": embedding,
+            "embedding": self._embedding_value(embedding),
         }
         self._client.table("embeddings").upsert(payload, on_conflict="summary_id,model").execute()
 
@@ -325,7 +398,7 @@ class SupabaseDB:
             "published_at": published_at.isoformat() if published_at else None,
             "model": model,
             "dimension": dimension,
-            "embedding": embedding,
+            "embedding": self._embedding_value(embedding),
         }
 
         if payload["published_at"] is None:
@@ -342,3 +415,57 @@ class SupabaseDB:
                 self._client.table("video_summary_embeddings").upsert(payload, on_conflict="video_id,model").execute()
                 return
             raise
+
+    def upsert_video_summary_embeddings(
+        self,
+        *,
+        model: str,
+        items: list[tuple[str, datetime | None, list[float]]],
+    ) -> None:
+        """Bulk variant of `upsert_video_summary_embedding` for (video_id, published_at, embedding) items."""
+
+        if not items:
+            return
+
+        # PostgREST bulk upserts need uniform keys, so rows with/without published_at go separately.
+        with_published: list[dict[str, Any]] = []
+        without_published: list[dict[str, Any]] = []
+        for video_id, published_at, embedding in items:
+            row: dict[str, Any] = {
+                "video_id": video_id,
+                "model": model,
+                "dimension": len(embedding),
+                "embedding": self._embedding_value(embedding),
+            }
+            if published_at is not None:
+                row["published_at"] = published_at.isoformat()
+                with_published.append(row)
+            else:
+                without_published.append(row)
+
+        table = self._client.table("video_summary_embeddings")
+        if with_published:
+            try:
+                table.upsert(with_published, on_conflict="video_id,model").execute()
+            except Exception as exc:
+                # Backward compatibility: older schemas may not have published_at.
+                msg = str(exc)
+                if not ("published_at" in msg and ("does not exist" in msg or "column" in msg)):
+                    raise
+                for row in with_published:
+                    row.pop("published_at", None)
+                without_published.extend(with_published)
+        if without_published:
+            table.upsert(without_published, on_conflict="video_id,model").execute()
+
+    def _embedding_value(self, embedding: list[float]) -> Any:
+        """Embedding as sent to PostgREST: a float list, or a compact half-precision literal.
+
+        JSON floats serialize with ~17 significant digits; 4 (`%.4g`, about float16 precision,
+        far below what cosine ranking of unit vectors can tell apart) cuts the request body
+        ~3x. pgvector parses the same `[x,y,...]` literal into `vector` or `halfvec` columns.
+        """
+
+        if not self._half_precision_embeddings:
+            return embedding
+        return "[" + ",".join(f"{x:.4g}" for x in embedding) + "]"
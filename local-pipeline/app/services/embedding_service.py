@@ -1,12 +1,84 @@
 from __future__ import annotations
 
+import base64
+import hashlib
 import logging
-from typing import Any, List
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
+from app.core.cache import SqliteCache
+
 logger = logging.getLogger(__name__)
 
+# Embeddings are deterministic per (model, max_length, text); the TTL only bounds the cache file.
+_CACHE_TTL_SECONDS = 30 * 86400
+_MEMO_MAX_ITEMS = 4096
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _simhash(text: str) -> int:
+    """64-bit SimHash over word 2-shingles; near-identical texts differ in few bits."""
+
+    words = _WORD_RE.findall((text or "").lower())
+    features = Counter(zip(words, words[1:])) if len(words) > 1 else Counter((w, "") for w in words)
+    weights = [0] * 64
+    for feature, count in features.items():
+        h = int.from_bytes(hashlib.blake2b(" ".join(feature).encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+class _FingerprintIndex:
+    """Bounded LRU of SimHash fingerprints with banded lookup.
+
+    The 64 bits are split into `max_bits + 1` bands; two fingerprints within `max_bits`
+    differ in at most that many bands, so they share at least one band exactly (pigeonhole).
+    Lookups only compare against entries in the probe's buckets instead of scanning all.
+    """
+
+    def __init__(self, *, max_bits: int, max_items: int) -> None:
+        self._max_bits = max_bits
+        self._max_items = max(1, max_items)
+        count = min(64, max_bits + 1)
+        bounds = [64 * b // count for b in range(count + 1)]
+        self._bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._entries: "OrderedDict[int, Tuple[int, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._next_id = 0
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        return [(b, fingerprint >> lo & mask) for b, (lo, mask) in enumerate(self._bands)]
+
+    def find(self, fingerprint: int) -> Any | None:
+        for key in self._band_keys(fingerprint):
+            for entry_id in self._buckets.get(key, ()):
+                other, value = self._entries[entry_id]
+                if (other ^ fingerprint).bit_count() <= self._max_bits:
+                    self._entries.move_to_end(entry_id)
+                    return value
+        return None
+
+    def add(self, fingerprint: int, value: Any) -> None:
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (fingerprint, value)
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        if len(self._entries) > self._max_items:
+            old_id, (old_fingerprint, _) = self._entries.popitem(last=False)
+            for key in self._band_keys(old_fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(old_id)
+                    if not bucket:
+                        del self._buckets[key]
+
 
 class EmbeddingService:
     """Generate embeddings using the Qwen3-0.6B HuggingFace model.
@@ -18,6 +90,14 @@ class EmbeddingService:
     Notes:
     - This is CPU/GPU heavy; for cron usage, consider caching model weights and
       running on a machine with sufficient RAM.
+    - With a `cache`, vectors are stored as float16 keyed by sha256(model, max_length, text),
+      so repeated texts (reruns, identical summaries) skip the model entirely.
+    - With `near_duplicate_bits > 0`, `embed_texts(..., near_duplicates=True)` lets a text
+      whose SimHash is within that Hamming distance of a recently embedded one reuse its
+      vector (off by default; callers that threshold on cosine should not opt in).
+    - With a `server_url`, batches are sent to an OpenAI-compatible `/embeddings` endpoint
+      (Infinity, text-embeddings-inference) instead of loading the model in-process; the
+      server batches concurrent requests across workers itself.
     """
 
     def __init__(
@@ -27,11 +107,24 @@ class EmbeddingService:
         model_name: str,
         device: str = "auto",
         max_length: int = 512,
+        cache: SqliteCache | None = None,
+        near_duplicate_bits: int = 0,
+        server_url: str | None = None,
     ) -> None:
+        self._server_url = server_url.rstrip("/") if server_url else None
+        self._http: Any = None
         self._hf_token = hf_token
         self._model_name = model_name
         self._device = device
         self._max_length = max_length
+        self._cache = cache
+        # In-process LRU in front of the SQLite cache.
+        self._memo: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        # Serializes model loading and forward passes when called from several threads.
+        self._model_lock = threading.Lock()
+        self._near_duplicate_bits = max(0, int(near_duplicate_bits))
+        self._fingerprints = _FingerprintIndex(max_bits=self._near_duplicate_bits, max_items=_MEMO_MAX_ITEMS)
 
         self._tokenizer: Any = None
         self._model: Any = None
@@ -41,11 +134,102 @@ class EmbeddingService:
         vectors = self.embed_texts([text])
         return vectors[0] if vectors else []
 
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    def embed_texts(
+        self,
+        texts: List[str],
+        *,
+        batch_size: int = 16,
+        near_duplicates: bool = False,
+    ) -> List[List[float]]:
+        """Embed many texts, running the model over `batch_size` inputs per forward pass.
+
+        `near_duplicates=True` opts this call into SimHash vector reuse (see class notes).
+        """
+
         if not texts:
             return []
-        self._ensure_loaded()
 
+        keys = [self._cache_key(t) for t in texts]
+        vectors: List[Optional[List[float]]] = [self._cache_get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+
+        # Identical texts (e.g. boilerplate summaries of different videos) are embedded once.
+        duplicates: Dict[int, int] = {}
+        first_by_key: Dict[str, int] = {}
+        for i in missing:
+            first = first_by_key.setdefault(keys[i], i)
+            if first != i:
+                duplicates[i] = first
+        if duplicates:
+            missing = [i for i in missing if i not in duplicates]
+
+        aliases: Dict[int, int] = {}
+        new_fingerprints: List[Tuple[int, int]] = []
+        if missing and near_duplicates and self._near_duplicate_bits:
+            # Near duplicates within this call alias their first occurrence.
+            local = _FingerprintIndex(max_bits=self._near_duplicate_bits, max_items=len(missing))
+            remaining: List[int] = []
+            for i in missing:
+                fp = _simhash(texts[i])
+                hit = self._near_duplicate(fp)
+                if hit is not None:
+                    vectors[i] = hit
+                    continue
+                rep = local.find(fp)
+                if rep is not None:
+                    aliases[i] = rep
+                    continue
+                local.add(fp, i)
+                new_fingerprints.append((fp, i))
+                remaining.append(i)
+            missing = remaining
+
+        if missing:
+            # Batch texts of similar length together so each batch pads to a short max
+            # instead of the longest text overall; results are mapped back to input order.
+            order = sorted(missing, key=lambda i: len(texts[i] or ""))
+            step = max(1, int(batch_size))
+            for start in range(0, len(order), step):
+                idx = order[start : start + step]
+                for i, vector in zip(idx, self._embed_batch([texts[i] for i in idx])):
+                    vectors[i] = vector
+                    self._cache_set(keys[i], vector)
+
+        if new_fingerprints:
+            with self._memo_lock:
+                for fp, i in new_fingerprints:
+                    self._fingerprints.add(fp, vectors[i] or [])
+        for i, rep in aliases.items():
+            vectors[i] = vectors[rep]
+        for i, first in duplicates.items():
+            vectors[i] = vectors[first]
+        return [v or [] for v in vectors]
+
+    def _near_duplicate(self, fingerprint: int) -> Optional[List[float]]:
+        with self._memo_lock:
+            return self._fingerprints.find(fingerprint)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if self._server_url:
+            return self._embed_remote(texts)
+        with self._model_lock:
+            self._ensure_loaded()
+            return self._embed_local(texts)
+
+    def _embed_remote(self, texts: List[str]) -> List[List[float]]:
+        if self._http is None:
+            import httpx
+
+            with self._model_lock:
+                if self._http is None:
+                    self._http = httpx.Client(base_url=self._server_url or "", timeout=120.0)
+
+        resp = self._http.post("/embeddings", json={"model": self._model_name, "input": texts})
+        resp.raise_for_status()
+        rows = sorted(resp.json()["data"], key=lambda row: row["index"])
+        return self._normalized_rows(np.asarray([row["embedding"] for row in rows], dtype=np.float32))
+
+    def _embed_local(self, texts: List[str]) -> List[List[float]]:
         torch: Any = self._torch
         tokenizer: Any = self._tokenizer
         model: Any = self._model
@@ -74,13 +258,70 @@ class EmbeddingService:
 
             pooled = pooled.detach().cpu().numpy().astype(np.float32)
 
+        return self._normalized_rows(pooled)
+
+    @staticmethod
+    def _normalized_rows(pooled: np.ndarray) -> List[List[float]]:
         # Normalize for cosine similarity search
         norms = np.linalg.norm(pooled, axis=1, keepdims=True)
         pooled = pooled / np.clip(norms, 1e-12, None)
 
         return [row.tolist() for row in pooled]
 
+    def _cache_key(self, text: str) -> str:
+        # Servers pool/truncate on their side, so their vectors are cached apart from local ones.
+        model = f"{self._model_name}@server" if self._server_url else self._model_name
+        raw = f"{model}\0{self._max_length}\0{text or ''}"
+        return "embedding:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        with self._memo_lock:
+            vector = self._memo.get(key)
+            if vector is not None:
+                self._memo.move_to_end(key)
+                return vector
+        if self._cache is None:
+            return None
+        try:
+            raw = self._cache.get(key)
+            if not raw:
+                return None
+            vector = np.frombuffer(base64.b64decode(raw), dtype=np.float16).astype(np.float32).tolist()
+        except Exception:
+            logger.warning("Ignoring unreadable embedding cache entry key=%s", key)
+            return None
+        self._remember(key, vector)
+        return vector
+
+    def _cache_set(self, key: str, vector: List[float]) -> None:
+        self._remember(key, vector)
+        if self._cache is None:
+            return
+        try:
+            # float16 halves the stored size; vectors are unit-normalized so the precision loss is ~1e-3.
+            packed = base64.b64encode(np.asarray(vector, dtype=np.float16).tobytes()).decode("ascii")
+            self._cache.set(key, packed, expire=_CACHE_TTL_SECONDS)
+        except Exception:
+            logger.warning("Failed to write embedding cache entry key=%s", key)
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._memo_lock:
+            self._memo[key] = vector
+            self._memo.move_to_end(key)
+            if len(self._memo) > _MEMO_MAX_ITEMS:
+                self._memo.popitem(last=False)
+
     def embedding_dimension(self) -> int:
+        if self._server_url:
+            # The server hosts `model_name`: read its width from config.json (no weights, no
+            # embedding request).
+            from transformers import AutoConfig
+
+            config = AutoConfig.from_pretrained(self._model_name, token=self._hf_token or None)
+            dim = getattr(config, "hidden_size", None)
+            if isinstance(dim, int) and dim > 0:
+                return dim
+            raise RuntimeError(f"Cannot infer embedding dimension for model={self._model_name}")
         self._ensure_loaded()
         # Try to infer from model config
         dim = getattr(self._model.config, "hidden_size", None)
@@ -4,7 +4,7 @@ import json
 import logging
 import re
 from datetime import date
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
@@ -12,17 +12,35 @@ from pydantic import SecretStr
 from pydantic import ValidationError
 
 from app.core.logging import log_llm_prompt_stats
+from app.core.rate_limit import RateLimiter, rate_limited
 from app.models.schemas import AggregatedSummary, DailyOverallSummary, VideoOverallSummary
 
 logger = logging.getLogger(__name__)
 
+# ASCII punctuation ignored when comparing bullets ($ % . - / carry meaning and are kept).
+# Non-ASCII text (CJK, accented letters) is left alone so non-English bullets keep a key.
+_BULLET_PUNCT_RE = re.compile(r"[!\"#&'()*+,:;<=>?@\[\\\]^_`{|}~]")
+
 
 class SummarizationService:
     """Summarize transcript chunks and aggregate by ticker."""
 
-    def __init__(self, *, openai_api_key: str, model: str, temperature: float) -> None:
+    def __init__(
+        self,
+        *,
+        openai_api_key: str,
+        model: str,
+        temperature: float,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
         self._model = model
-        self._llm = ChatOpenAI(api_key=SecretStr(openai_api_key), model=model, temperature=temperature)
+        # JSON mode: every prompt here asks for a single JSON object.
+        self._llm = rate_limited(
+            ChatOpenAI(api_key=SecretStr(openai_api_key), model=model, temperature=temperature).bind(
+                response_format={"type": "json_object"}
+            ),
+            rate_limiter,
+        )
 
         self._agg_video_prompt = PromptTemplate(
             input_variables=["items"],
@@ -72,6 +90,36 @@ class SummarizationService:
             ),
         )
 
+        self._video_combined_prompt = PromptTemplate(
+            input_variables=["title", "channel", "items"],
+            template=(
+                "Aggregate chunk keypoints per ticker AND summarize the whole video in ONE pass.\n"
+                "Return a SINGLE JSON object only (no markdown fences, no extra text).\n"
+                "Use double quotes for all keys/strings; no trailing commas.\n"
+                "Do not invent facts/tickers; omit uncertainty.\n"
+                "Always include ALL keys in the schema; use empty string/list/null when needed.\n\n"
+                "items: one entry per input ticker; do not create or rename tickers.\n"
+                "items: positive/negative/neutral are arrays of concise, de-duplicated plain-string bullets (max 10 each).\n\n"
+                "overall: summarize the video using ONLY the aggregated items.\n"
+                "overall: only include the MOST IMPORTANT / market-moving items; omit minor details.\n"
+                "overall.summary_markdown is markdown BUT must not contain curly braces.\n"
+                "overall.overall_explanation is plain text (max 5 sentences).\n"
+                "overall.movers: the key tickers driving the story (max 5), do NOT include MARKET.\n"
+                "overall.movers: each item has keys: symbol, direction (up|down|mixed), reason (max 5 sentences).\n"
+                "overall.risks/opportunities are concise bullets (max 10 each).\n"
+                "overall.events are catalysts mentioned in the items (max 10).\n"
+                "Each event: date (YYYY-MM-DD or null), timeframe (e.g., 'next week'/'Q1' or null), description, tickers (subset of tickers).\n"
+                "overall.key_points are the top takeaways (max 10) AND must not repeat any item in risks, opportunities, or event descriptions.\n"
+                "overall.sentiment is bullish|bearish|mixed|neutral or null (null if unclear).\n\n"
+                "Title: {title}\n"
+                "Channel: {channel}\n\n"
+                "Input items (JSON list; each has keys: ticker, chunk_summaries where each chunk summary has keys: positive, negative, neutral):\n"
+                "{items}\n\n"
+                "Schema: {{\"items\":[{{\"ticker\":...,\"positive\":[...],\"negative\":[...],\"neutral\":[...]}}],"
+                "\"overall\":{{\"summary_markdown\":...,\"overall_explanation\":...,\"movers\":[{{\"symbol\":...,\"direction\":...,\"reason\":...}}],\"risks\":[...],\"opportunities\":[...],\"key_points\":[...],\"sentiment\":null,\"events\":[{{\"date\":null,\"timeframe\":null,\"description\":...,\"tickers\":[...]}}]}}}}"
+            ),
+        )
+
         self._daily_prompt = PromptTemplate(
             input_variables=["market_date", "items"],
             template=(
@@ -115,24 +163,11 @@ class SummarizationService:
         if not grouped_chunk_summaries:
             return {}
 
-        # Prefer the most-mentioned tickers (more chunks => more signal) if we must cap.
-        tickers_sorted = sorted(
-            grouped_chunk_summaries.keys(),
-            key=lambda t: (-len(grouped_chunk_summaries.get(t) or []), str(t)),
+        items = self._build_aggregate_items(
+            grouped_chunk_summaries,
+            max_tickers=max_tickers,
+            max_chunks_per_ticker=max_chunks_per_ticker,
         )
-        tickers_sorted = tickers_sorted[: max_tickers if max_tickers > 0 else len(tickers_sorted)]
-
-        items: List[Dict[str, Any]] = []
-        for t in tickers_sorted:
-            cs = grouped_chunk_summaries.get(t) or []
-            if max_chunks_per_ticker > 0:
-                cs = cs[:max_chunks_per_ticker]
-            items.append(
-                {
-                    "ticker": str(t).strip().upper(),
-                    "chunk_summaries": cs,
-                }
-            )
 
         try:
             items_json = self._json_dumps_with_char_limit(items, max_chars=max_chars)
@@ -154,27 +189,109 @@ class SummarizationService:
             if not parsed:
                 return {}
 
-            raw_items = parsed.get("items")
-            if not isinstance(raw_items, list):
-                return {}
-
-            out: Dict[str, AggregatedSummary] = {}
-            for it in raw_items:
-                if not isinstance(it, dict):
-                    continue
-                ticker = (it.get("ticker") or "").strip().upper()
-                if not ticker:
-                    continue
-                try:
-                    out[ticker] = AggregatedSummary.model_validate(it)
-                except ValidationError:
-                    continue
-
-            return out
+            return self._parse_aggregate_items(parsed.get("items"))
         except Exception:
             logger.exception("Video-level aggregation failed")
             return {}
 
+    async def asummarize_video_combined(
+        self,
+        *,
+        grouped_chunk_summaries: Dict[str, List[Dict[str, Any]]],
+        title: str,
+        channel: str,
+        max_chars: int = 22000,
+        max_tickers: int = 25,
+        max_chunks_per_ticker: int = 10,
+    ) -> Tuple[Dict[str, AggregatedSummary], VideoOverallSummary]:
+        """Aggregate per-ticker keypoints and summarize the video in a single LLM call.
+
+        Saves the second round trip (and re-sending the aggregated content) of
+        `aggregate_video_tickers` + `summarize_video_overall_from_aggregates`.
+        Either half may come back empty on invalid output; callers should fall back to
+        the two-step path for whatever is missing.
+        """
+
+        if not grouped_chunk_summaries:
+            return {}, self._empty_video_overall()
+
+        try:
+            prompt = self._build_video_combined_prompt(
+                grouped_chunk_summaries,
+                title=title,
+                channel=channel,
+                max_chars=max_chars,
+                max_tickers=max_tickers,
+                max_chunks_per_ticker=max_chunks_per_ticker,
+            )
+            msg = await self._llm.ainvoke(prompt)
+            parsed = self._safe_json(str(msg.content))
+        except Exception:
+            logger.exception("Combined video summarization failed")
+            return {}, self._empty_video_overall()
+
+        return self._parse_video_combined(parsed)
+
+    def _build_video_combined_prompt(
+        self,
+        grouped_chunk_summaries: Dict[str, List[Dict[str, Any]]],
+        *,
+        title: str,
+        channel: str,
+        max_chars: int,
+        max_tickers: int,
+        max_chunks_per_ticker: int,
+    ) -> str:
+        items = self._build_aggregate_items(
+            grouped_chunk_summaries,
+            max_tickers=max_tickers,
+            max_chunks_per_ticker=max_chunks_per_ticker,
+        )
+        items_json = self._json_dumps_with_char_limit(items, max_chars=max_chars)
+        prompt = self._video_combined_prompt.format(
+            title=(title or "")[:300],
+            channel=(channel or "")[:200],
+            items=items_json,
+        )
+        log_llm_prompt_stats(
+            logger,
+            model=self._model,
+            label="summarize_video_combined",
+            prompt=prompt,
+            extra={
+                "items_chars": len(items_json),
+                "tickers_count": len(items),
+                "max_tickers": max_tickers,
+                "max_chunks_per_ticker": max_chunks_per_ticker,
+            },
+        )
+        return prompt
+
+    def _parse_video_combined(
+        self, parsed: dict | None
+    ) -> Tuple[Dict[str, AggregatedSummary], VideoOverallSummary]:
+        empty_overall = self._empty_video_overall()
+        if not parsed:
+            return {}, empty_overall
+
+        aggregated = self._parse_aggregate_items(parsed.get("items"))
+
+        overall = empty_overall
+        raw_overall = parsed.get("overall")
+        if isinstance(raw_overall, dict):
+            try:
+                overall = VideoOverallSummary.model_validate(raw_overall)
+                self._postprocess_video_overall_summary(overall)
+            except ValidationError:
+                logger.warning("Combined video summary JSON failed validation")
+                overall = empty_overall
+
+        return aggregated, overall
+
+    @staticmethod
+    def _empty_video_overall() -> VideoOverallSummary:
+        return VideoOverallSummary(summary_markdown="", key_points=[], tickers=[], sentiment=None)
+
     def summarize_video_overall_from_aggregates(
         self,
         *,
@@ -264,6 +381,57 @@ class SummarizationService:
             opportunities=[],
         )
 
+    @classmethod
+    def _build_aggregate_items(
+        cls,
+        grouped_chunk_summaries: Dict[str, List[Dict[str, Any]]],
+        *,
+        max_tickers: int,
+        max_chunks_per_ticker: int,
+    ) -> List[Dict[str, Any]]:
+        """Build the `items` prompt input: [{ticker, chunk_summaries}] capped per ticker."""
+
+        # Prefer the most-mentioned tickers (more chunks => more signal) if we must cap.
+        tickers_sorted = sorted(
+            grouped_chunk_summaries.keys(),
+            key=lambda t: (-len(grouped_chunk_summaries.get(t) or []), str(t)),
+        )
+        tickers_sorted = tickers_sorted[: max_tickers if max_tickers > 0 else len(tickers_sorted)]
+
+        items: List[Dict[str, Any]] = []
+        for t in tickers_sorted:
+            cs = grouped_chunk_summaries.get(t) or []
+            if max_chunks_per_ticker > 0:
+                cs = cs[:max_chunks_per_ticker]
+            cs = cls._dedupe_chunk_summaries(cs)
+            items.append(
+                {
+                    "ticker": str(t).strip().upper(),
+                    "chunk_summaries": cs,
+                }
+            )
+        return items
+
+    @staticmethod
+    def _parse_aggregate_items(raw_items: Any) -> Dict[str, AggregatedSummary]:
+        """Parse the model's `items` array into TICKER -> AggregatedSummary (invalid entries skipped)."""
+
+        if not isinstance(raw_items, list):
+            return {}
+
+        out: Dict[str, AggregatedSummary] = {}
+        for it in raw_items:
+            if not isinstance(it, dict):
+                continue
+            ticker = (it.get("ticker") or "").strip().upper()
+            if not ticker:
+                continue
+            try:
+                out[ticker] = AggregatedSummary.model_validate(it)
+            except ValidationError:
+                continue
+        return out
+
     @staticmethod
     def _json_dumps_with_char_limit(items: List[Any], *, max_chars: int) -> str:
         """Serialize to JSON while respecting a rough character budget.
@@ -303,10 +471,20 @@ class SummarizationService:
         text = (text or "").strip()
         if not text:
             return None
+
+        # Fast path: JSON mode means the reply is normally a bare object.
+        try:
+            parsed = json.loads(text)
+            return parsed if isinstance(parsed, dict) else None
+        except json.JSONDecodeError:
+            pass
+
+        # Strip any accidental leading/trailing prose
         first = text.find("{")
         last = text.rfind("}")
         if first == -1 or last == -1 or last <= first:
             return None
+
         candidate = text[first : last + 1]
         try:
             parsed = json.loads(candidate)
@@ -322,21 +500,46 @@ class SummarizationService:
         if not s:
             return ""
 
-        # Collapse whitespace and remove most punctuation so similar bullets match.
+        # Collapse whitespace and remove ASCII punctuation so similar bullets match.
         s = re.sub(r"\s+", " ", s)
-        s = re.sub(r"[^a-z0-9$%\s.\-/]", "", s)
-        return s.strip()
+        key = _BULLET_PUNCT_RE.sub("", s).strip()
+        # A bullet made only of punctuation still needs a non-empty key to be kept.
+        return key or s
 
     @classmethod
-    def _dedupe_string_list(cls, items: List[str] | None, *, max_items: int | None = None) -> List[str]:
-        seen: set[str] = set()
+    def _dedupe_chunk_summaries(cls, chunk_summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop bullets already seen in an earlier chunk of the same ticker.
+
+        Repeated guidance/facts across chunks only burn prompt tokens. Chunk summaries
+        left with no bullets at all are dropped.
+        """
+
+        seen: Dict[str, set[str]] = {"positive": set(), "negative": set(), "neutral": set()}
+        out: List[Dict[str, Any]] = []
+        for c in chunk_summaries or []:
+            if not isinstance(c, dict):
+                continue
+            deduped = {k: cls._dedupe_string_list(c.get(k) or [], seen=seen[k]) for k in seen}
+            if deduped["positive"] or deduped["negative"] or deduped["neutral"]:
+                out.append(deduped)
+        return out
+
+    @classmethod
+    def _dedupe_string_list(
+        cls,
+        items: List[str] | None,
+        *,
+        max_items: int | None = None,
+        seen: set[str] | None = None,
+    ) -> List[str]:
+        seen = set() if seen is None else seen
         out: List[str] = []
         for raw in items or []:
             s = str(raw).strip()
             if not s:
                 continue
             key = cls._normalize_bullet(s)
-            if not key or key in seen:
+            if key in seen:
                 continue
             seen.add(key)
             out.append(s)
@@ -1,21 +1,232 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
+import hashlib
 import json
 import logging
 import re
-from typing import List, Set
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
 
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 from pydantic import ValidationError
 
-from app.core.logging import log_llm_prompt_stats
-from app.models.schemas import ExtractionResult
+from app.core.cache import SqliteCache
+from app.core.logging import load_encoding, log_llm_prompt_stats
+from app.core.rate_limit import RateLimiter, rate_limited
+from app.models.schemas import ExtractionResult, TickerTopicPair
 
 logger = logging.getLogger(__name__)
 
-_TICKER_RE = re.compile(r"\$([A-Z]{1,5})(?=\b|[\s.,;:!?])")
+# Bump whenever the extraction prompts/normalization change so cached results are not reused.
+PROMPT_VERSION = "v2"
+
+_CACHE_TTL_SECONDS = 7 * 86400
+
+# Per-chunk prompt budget. Token-exact when tiktoken is available, else a rough char cap.
+_MAX_CHUNK_TOKENS = 3000
+_MAX_CHUNK_CHARS = 12000
+
+# `\b` already covers the old `(?=\b|[\s.,;:!?])` lookahead (all those chars are non-word),
+# and without lookaround the pattern is RE2-compatible (linear-time DFA when installed).
+_TICKER_PATTERN = r"\$([A-Z]{1,5})\b"
+try:
+    import re2  # type: ignore
+
+    _TICKER_RE = re2.compile(_TICKER_PATTERN)
+except Exception:
+    # ASCII `\b` (same semantics as RE2) avoids Unicode word-class lookups per boundary check.
+    _TICKER_RE = re.compile(_TICKER_PATTERN, re.ASCII)
+
+_TICKER_SYMBOL_RE = re.compile(r"[A-Z]{1,5}", re.ASCII)
+
+try:
+    import ahocorasick  # type: ignore
+except Exception:  # pragma: no cover
+    ahocorasick = None
+
+_FOCUS_RULES = (
+    "Focus on HIGH-SIGNAL items: risks, opportunities, and catalysts/events (earnings, guidance changes, product launches, M&A, lawsuits, regulation, macro releases like CPI/FOMC/jobs, rate cuts/hikes).\n"
+    "If a statement is uncertain, preserve the uncertainty (e.g., 'Speaker expects/might/could ...').\n\n"
+)
+
+_PAIR_RULES = (
+    "- Each item in ticker_topic_pairs must be:\n"
+    "  {{\"ticker\": \"AAPL\", \"positive_keypoints\": [...], \"negative_keypoints\": [...], \"neutral_keypoints\": [...]}}\n"
+    "- ticker: uppercase letters only, 1-5 chars (no '$'). Use ticker \"MARKET\" for macro/market-wide items.\n"
+    "- Keypoints: short bullet-like strings. Prefer numbers + direction + timeframe/date when present.\n"
+    "- Categorize: upside/opportunities in positive_keypoints; risks/headwinds in negative_keypoints; dated facts/events (if not clearly +/-) in neutral_keypoints.\n"
+    "- Include explicit $TICKER mentions. Infer ticker from company name only when you are confident; otherwise omit the ticker rather than guessing.\n"
+)
+
+# Structured-output schemas mirroring the prompt shapes (strict mode: every key required,
+# no extras). Replies then always parse, so malformed output no longer costs per-chunk retries.
+_PAIR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "ticker": {"type": "string"},
+        "positive_keypoints": {"type": "array", "items": {"type": "string"}},
+        "negative_keypoints": {"type": "array", "items": {"type": "string"}},
+        "neutral_keypoints": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["ticker", "positive_keypoints", "negative_keypoints", "neutral_keypoints"],
+    "additionalProperties": False,
+}
+_PAIRS_PROPERTY: Dict[str, Any] = {"type": "array", "items": _PAIR_SCHEMA}
+_SINGLE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"ticker_topic_pairs": _PAIRS_PROPERTY},
+    "required": ["ticker_topic_pairs"],
+    "additionalProperties": False,
+}
+_BATCH_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "integer"}, "ticker_topic_pairs": _PAIRS_PROPERTY},
+                "required": ["id", "ticker_topic_pairs"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False,
+}
+
+
+def _json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _is_response_format_rejection(exc: BaseException) -> bool:
+    """A 400 from the API refusing the requested response_format (no json_schema support)."""
+
+    if getattr(exc, "status_code", None) != 400:
+        return False
+    message = str(exc).lower()
+    return "response_format" in message or "json_schema" in message
+
+
+def _regex_tickers(text: str | None) -> Set[str]:
+    """Explicit $TICKER mentions; skips the regex engine when the text has no '$' at all."""
+
+    if not text or "$" not in text:
+        return set()
+    # Single capture group => findall returns plain strings (no Match objects).
+    return set(_TICKER_RE.findall(text))
+
+
+def _regex_tickers_many(texts: List[str]) -> List[Set[str]]:
+    """`_regex_tickers` for many chunks with a single scan over one joined buffer.
+
+    Chunks are joined with a newline (a non-word char, so `\b` and `$` never match
+    across the seam) and match offsets are mapped back to chunk indices.
+    """
+
+    out: List[Set[str]] = [set() for _ in texts]
+    idx = [i for i, t in enumerate(texts) if t and "$" in t]
+    if not idx:
+        return out
+
+    starts: List[int] = []
+    pos = 0
+    for i in idx:
+        starts.append(pos)
+        pos += len(texts[i]) + 1
+    buf = "\n".join(texts[i] for i in idx)
+
+    for m in _TICKER_RE.finditer(buf):
+        out[idx[bisect.bisect_right(starts, m.start()) - 1]].add(m.group(1))
+    return out
+
+
+def load_ticker_universe(path: str | Path) -> List[str]:
+    """Terms for the extraction prefilter: one per line (tickers, company names, macro words).
+
+    Blank lines and `#` comments are ignored.
+    """
+
+    terms: List[str] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        term = line.split("#", 1)[0].strip()
+        if term:
+            terms.append(term)
+    return terms
+
+
+class _TermMatcher:
+    """Case-insensitive whole-word "does the text mention any term" check.
+
+    Uses a pyahocorasick automaton (one pass over the text regardless of universe size)
+    when installed, else one alternation regex.
+    """
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        words = sorted({t.strip().lower() for t in terms if t and t.strip()}, key=len, reverse=True)
+        self._automaton: Any = None
+        self._regex: Any = None
+        if not words:
+            return
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for word in words:
+                automaton.add_word(word, len(word))
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._regex = re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\b", re.IGNORECASE)
+
+    def search(self, text: str) -> bool:
+        if self._regex is not None:
+            return self._regex.search(text) is not None
+        if self._automaton is None:
+            return False
+        lowered = text.lower()
+        for end, length in self._automaton.iter(lowered):
+            start = end - length + 1
+            # Whole words only: short tickers ("ON", "IT") must not match inside other words.
+            if (start == 0 or not lowered[start - 1].isalnum()) and (
+                end + 1 == len(lowered) or not lowered[end + 1].isalnum()
+            ):
+                return True
+        return False
+
+
+def _split_template(template: PromptTemplate, variable: str) -> Tuple[str, str]:
+    """Render a single-variable template around a sentinel and return (head, tail)."""
+
+    sentinel = "\x00slot\x00"
+    head, found, tail = template.format(**{variable: sentinel}).partition(sentinel)
+    if not found:
+        raise ValueError(f"Template has no {{{variable}}} slot")
+    return head, tail
+
+
+class _BatchPlan:
+    """Per-call state for `aextract_batch` and `prefetch_with_batch_api`."""
+
+    def __init__(self, *, regex_tickers: List[Set[str]], cache_keys: List[str], first_index: Dict[str, int]) -> None:
+        self.regex_tickers = regex_tickers
+        self.cache_keys = cache_keys
+        self.first_index = first_index
+        self.unique = list(first_index.values())
+        self.results: List[ExtractionResult | None] = [None] * len(cache_keys)
+        self.batches: List[List[int]] = []
+        self.prompts: List[str] = []
+
+    def missing(self) -> List[int]:
+        return [i for i in self.unique if self.results[i] is None]
+
+    def ordered_results(self) -> List[ExtractionResult]:
+        # Every distinct text has a result at its first index by now.
+        return [self.results[self.first_index[key]] or ExtractionResult() for key in self.cache_keys]
 
 
 class TickerTopicService:
@@ -26,31 +237,43 @@ class TickerTopicService:
     - LLM extraction to infer tickers from company names and produce categorized keypoints
     """
 
-    def __init__(self, *, openai_api_key: str, model: str, temperature: float) -> None:
+    def __init__(
+        self,
+        *,
+        openai_api_key: str,
+        model: str,
+        temperature: float,
+        cache: SqliteCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        structured_outputs: bool = True,
+        universe: Iterable[str] | None = None,
+    ) -> None:
+        self._openai_api_key = openai_api_key
+        # Optional prefilter: chunks mentioning no universe term and no $TICKER skip the LLM.
+        self._universe = _TermMatcher(universe) if universe is not None else None
         self._model = model
-        self._llm = ChatOpenAI(api_key=SecretStr(openai_api_key), model=model, temperature=temperature)
+        self._temperature = temperature
+        self._cache = cache
+        self._chat = ChatOpenAI(api_key=SecretStr(openai_api_key), model=model, temperature=temperature)
+        self._rate_limiter = rate_limiter
+        self._structured_outputs_requested = structured_outputs
+        self._bind_llms(structured_outputs=structured_outputs)
 
         self._prompt = PromptTemplate(
             input_variables=["chunk_text"],
             template=(
                 "You are an expert financial analyst.\n"
                 "Task: From the transcript chunk below, extract up to 10 tickers (plus optional MARKET) and write concise, transcript-grounded keypoints.\n"
-                "Focus on HIGH-SIGNAL items: risks, opportunities, and catalysts/events (earnings, guidance changes, product launches, M&A, lawsuits, regulation, macro releases like CPI/FOMC/jobs, rate cuts/hikes).\n"
-                "If a statement is uncertain, preserve the uncertainty (e.g., 'Speaker expects/might/could ...').\n\n"
-                "Transcript chunk (verbatim):\n"
+                + _FOCUS_RULES
+                + "Transcript chunk (verbatim):\n"
                 "<chunk>\n"
                 "{chunk_text}\n"
                 "</chunk>\n\n"
                 "Output requirements:\n"
                 "- Output ONE valid JSON object only (no markdown/code fences, no commentary).\n"
                 "- JSON schema: {{\"ticker_topic_pairs\": [ ... ]}}.\n"
-                "- Each item in ticker_topic_pairs must be:\n"
-                "  {{\"ticker\": \"AAPL\", \"positive_keypoints\": [...], \"negative_keypoints\": [...], \"neutral_keypoints\": [...]}}\n"
-                "- ticker: uppercase letters only, 1-5 chars (no '$'). Use ticker \"MARKET\" for macro/market-wide items.\n"
-                "- Keypoints: short bullet-like strings. Prefer numbers + direction + timeframe/date when present.\n"
-                "- Categorize: upside/opportunities in positive_keypoints; risks/headwinds in negative_keypoints; dated facts/events (if not clearly +/-) in neutral_keypoints.\n"
-                "- Include explicit $TICKER mentions. Infer ticker from company name only when you are confident; otherwise omit the ticker rather than guessing.\n"
-                "- If there are no relevant tickers or macro items, return {{\"ticker_topic_pairs\": []}}.\n\n"
+                + _PAIR_RULES
+                + "- If there are no relevant tickers or macro items, return {{\"ticker_topic_pairs\": []}}.\n\n"
                 "Example output (shape only):\n"
                 "{{\n"
                 "  \"ticker_topic_pairs\": [\n"
@@ -61,29 +284,309 @@ class TickerTopicService:
             ),
         )
 
+        # Same rules as `_prompt`, but for several chunks at once so the rule block is paid once per batch.
+        self._batch_prompt = PromptTemplate(
+            input_variables=["chunks"],
+            template=(
+                "You are an expert financial analyst.\n"
+                "Task: For EACH transcript chunk below, independently extract up to 10 tickers (plus optional MARKET) and write concise, transcript-grounded keypoints.\n"
+                + _FOCUS_RULES
+                + "Transcript chunks (JSON list; each has keys: id, text (verbatim)):\n"
+                "{chunks}\n\n"
+                "Output requirements:\n"
+                "- Output ONE valid JSON object only (no markdown/code fences, no commentary).\n"
+                "- JSON schema: {{\"results\": [{{\"id\": 0, \"ticker_topic_pairs\": [ ... ]}}, ...]}}.\n"
+                "- Exactly one result per input chunk, with the same id. Never mix keypoints across chunks.\n"
+                + _PAIR_RULES
+                + "- If a chunk has no relevant tickers or macro items, return {{\"id\": <id>, \"ticker_topic_pairs\": []}} for it.\n"
+            ),
+        )
+
+        self._encoding = load_encoding(model)
+
+        # The templates are static apart from one slot: render them once so the hot path
+        # is plain string concatenation instead of re-parsing the template per call.
+        self._prompt_head, self._prompt_tail = _split_template(self._prompt, "chunk_text")
+        self._batch_prompt_head, self._batch_prompt_tail = _split_template(self._batch_prompt, "chunks")
+
+    def _bind_llms(self, *, structured_outputs: bool) -> None:
+        # Structured outputs constrain replies to the prompt's shape; plain JSON mode is the
+        # fallback for models without json_schema support.
+        if structured_outputs:
+            single_format = _json_schema_format("ticker_topic_extraction", _SINGLE_SCHEMA)
+            self._batch_response_format = _json_schema_format("ticker_topic_extraction_batch", _BATCH_SCHEMA)
+        else:
+            single_format = {"type": "json_object"}
+            self._batch_response_format = {"type": "json_object"}
+        self._structured_outputs = structured_outputs
+        self._llm = rate_limited(self._chat.bind(response_format=single_format), self._rate_limiter)
+        self._batch_llm = rate_limited(
+            self._chat.bind(response_format=self._batch_response_format), self._rate_limiter
+        )
+
+    def _disable_structured_outputs(self, exc: BaseException) -> bool:
+        """Switch to json_object mode if `exc` is the API rejecting json_schema; True means retry.
+
+        The rejection is logged once; calls already in flight with the old binding just retry.
+        """
+
+        if not self._structured_outputs_requested or not _is_response_format_rejection(exc):
+            return False
+        if self._structured_outputs:
+            logger.error(
+                "Model %s rejected json_schema structured outputs; using json_object for this run "
+                "(set OPENAI_STRUCTURED_OUTPUTS=false to skip the probe): %s",
+                self._model,
+                exc,
+            )
+            self._bind_llms(structured_outputs=False)
+        return True
+
     def extract(self, chunk_text: str) -> ExtractionResult:
         """Extract tickers with categorized keypoints."""
-        regex_tickers: Set[str] = {m.group(1) for m in _TICKER_RE.finditer(chunk_text or "")}
+        done, prompt, regex_tickers, cache_key = self._prepare_single(chunk_text)
+        if done is not None:
+            return done
+
+        llm_result = None
+        for attempt in range(2):
+            try:
+                llm_result = self._llm.invoke(prompt).content
+            except Exception as exc:
+                if attempt == 0 and self._disable_structured_outputs(exc):
+                    continue
+                logger.exception("Ticker/topic LLM call failed")
+            break
+
+        return self._finish_single(llm_result, regex_tickers, cache_key)
+
+    async def aextract(self, chunk_text: str) -> ExtractionResult:
+        """Async variant of `extract` (same prompt, cache and fallback)."""
+        done, prompt, regex_tickers, cache_key = self._prepare_single(chunk_text)
+        if done is not None:
+            return done
 
         llm_result = None
+        for attempt in range(2):
+            try:
+                llm_result = (await self._llm.ainvoke(prompt)).content
+            except Exception as exc:
+                if attempt == 0 and self._disable_structured_outputs(exc):
+                    continue
+                logger.exception("Ticker/topic LLM call failed")
+            break
+
+        return self._finish_single(llm_result, regex_tickers, cache_key)
+
+    def _prepare_single(self, chunk_text: str) -> Tuple[ExtractionResult | None, str, Set[str], str]:
+        """Shared front half of `extract`/`aextract`: (result if no LLM call is needed, prompt, regex tickers, cache key)."""
+        regex_tickers = _regex_tickers(chunk_text)
+
+        trimmed = self._trim_chunk(chunk_text)
+        cache_key = self._cache_key(trimmed)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached, "", regex_tickers, cache_key
+        if self._is_filler(chunk_text, regex_tickers):
+            return ExtractionResult(), "", regex_tickers, cache_key
+        return None, self._single_prompt(trimmed, regex_tickers), regex_tickers, cache_key
+
+    async def aextract_batch(
+        self,
+        chunks: List[str],
+        *,
+        batch_size: int = 8,
+        max_concurrency: int = 4,
+    ) -> List[ExtractionResult]:
+        """Extract tickers for many chunks, packing up to `batch_size` chunks per LLM call.
+
+        The shared rule block is paid once per batch instead of once per chunk, and
+        batches run concurrently. Chunks whose batched output is missing or malformed
+        fall back to a single-chunk `aextract` call, gathered under a semaphore.
+        Results are in input order.
+        """
+
+        if not chunks:
+            return []
+
+        # Planning tokenizes every chunk (trim + cache key) and every prompt (stats); tiktoken
+        # releases the GIL, so a worker thread keeps this off the event loop.
+        plan = await asyncio.to_thread(self._plan_batch, chunks, batch_size)
+        msgs: List[Any] = []
+        if plan.prompts:
+            msgs = await self._abatch(plan.prompts, max_concurrency)
+            # A json_schema rejection fails every prompt alike: rerun once in json_object mode.
+            if any(isinstance(m, Exception) and self._disable_structured_outputs(m) for m in msgs):
+                msgs = await self._abatch(plan.prompts, max_concurrency)
+        self._apply_batch_messages(plan, msgs)
+
+        missing = plan.missing()
+        if missing:
+            sem = asyncio.Semaphore(max(1, max_concurrency))
+
+            async def _one(i: int) -> ExtractionResult:
+                async with sem:
+                    return await self.aextract(chunks[i])
+
+            for i, er in zip(missing, await asyncio.gather(*[_one(i) for i in missing])):
+                plan.results[i] = er
+
+        return plan.ordered_results()
+
+    async def _abatch(self, prompts: List[str], max_concurrency: int) -> List[Any]:
+        """One reply (or exception) per prompt, in order."""
+
         try:
-            formatted_prompt = self._prompt.format(
-                chunk_text=(chunk_text or "")[:12000],
+            return await self._batch_llm.abatch(
+                prompts,
+                config={"max_concurrency": max(1, max_concurrency)},
+                return_exceptions=True,
             )
-            log_llm_prompt_stats(
-                logger,
-                model=self._model,
-                label="ticker_topic_extraction",
-                prompt=formatted_prompt,
-                extra={
-                    "chunk_chars": len(chunk_text or ""),
-                    "regex_tickers_count": len(regex_tickers),
+        except Exception as exc:
+            if not _is_response_format_rejection(exc):
+                logger.exception("Ticker/topic batch LLM call failed")
+            return [exc] * len(prompts)
+
+    def prefetch_with_batch_api(
+        self,
+        chunks: List[str],
+        *,
+        batch_size: int = 8,
+        poll_seconds: float = 30.0,
+        timeout_seconds: float = 24 * 3600,
+    ) -> int:
+        """Extract uncached chunks through the OpenAI Batch API and store results in the cache.
+
+        Meant for the nightly run, which has no latency target: Batch API calls are billed
+        at half price. Uses the same batched prompts as `aextract_batch`, so the later
+        per-video `aextract_batch` calls are served from the cache. Anything
+        the job does not return (failure, timeout, bad output) is simply left uncached
+        and goes through the realtime path as before. Returns the number of chunks cached.
+        """
+
+        if self._cache is None:
+            logger.warning("Batch API prefetch needs the local cache; skipping")
+            return 0
+
+        plan = self._plan_batch(chunks, batch_size)
+        if not plan.prompts:
+            return 0
+
+        contents = self._run_batch_job(plan.prompts, poll_seconds=poll_seconds, timeout_seconds=timeout_seconds)
+        self._apply_batch_messages(plan, contents)
+        return sum(1 for batch in plan.batches for i in batch if plan.results[i] is not None)
+
+    def _run_batch_job(self, prompts: List[str], *, poll_seconds: float, timeout_seconds: float) -> List[str | None]:
+        """Submit one chat-completions Batch API job and wait for it; replies in prompt order."""
+
+        from openai import OpenAI
+
+        client = OpenAI(api_key=self._openai_api_key)
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self._model,
+                        "temperature": self._temperature,
+                        "response_format": self._batch_response_format,
+                        "messages": [{"role": "user", "content": prompt}],
+                    },
                 },
+                ensure_ascii=False,
+            )
+            for i, prompt in enumerate(prompts)
+        ]
+        replies: List[str | None] = [None] * len(prompts)
+
+        try:
+            batch_file = client.files.create(
+                file=("ticker_topic_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            job = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
             )
-            msg = self._llm.invoke(formatted_prompt)
-            llm_result = msg.content
+            logger.info("Submitted ticker/topic Batch API job id=%s requests=%d", job.id, len(prompts))
+
+            deadline = time.monotonic() + timeout_seconds
+            while job.status in ("validating", "in_progress", "finalizing"):
+                if time.monotonic() >= deadline:
+                    logger.warning("Batch API job id=%s timed out; cancelling", job.id)
+                    client.batches.cancel(job.id)
+                    return replies
+                time.sleep(poll_seconds)
+                job = client.batches.retrieve(job.id)
+
+            if job.status != "completed" or not job.output_file_id:
+                logger.warning("Batch API job id=%s ended with status=%s", job.id, job.status)
+                return replies
+
+            output = client.files.content(job.output_file_id).text
         except Exception:
-            logger.exception("Ticker/topic LLM call failed")
+            logger.exception("Ticker/topic Batch API job failed")
+            return replies
+
+        for line in output.splitlines():
+            try:
+                row = json.loads(line)
+                response = row.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                i = int(row["custom_id"])
+                if 0 <= i < len(replies):
+                    replies[i] = response["body"]["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                continue
+        return replies
+
+    def _single_prompt(self, trimmed: str, regex_tickers: Set[str]) -> str:
+        formatted_prompt = self._prompt_head + trimmed + self._prompt_tail
+        log_llm_prompt_stats(
+            logger,
+            model=self._model,
+            label="ticker_topic_extraction",
+            prompt=formatted_prompt,
+            extra={
+                "chunk_chars": len(trimmed),
+                "regex_tickers_count": len(regex_tickers),
+            },
+        )
+        return formatted_prompt
+
+    @staticmethod
+    def with_regex_tickers(er: ExtractionResult, chunk_text: str) -> ExtractionResult:
+        """`er` (reused from another chunk) re-keyed to this chunk's own explicit $TICKERs.
+
+        Keypoint-less pairs only record the source chunk's $TICKERs, so they are dropped
+        unless this chunk has the same ticker. Then the same merge as
+        `_normalize_extraction_dict`: missing tickers are added without keypoints.
+        """
+
+        regex_tickers = _regex_tickers(chunk_text)
+        pairs = [
+            pair
+            for pair in er.ticker_topic_pairs
+            if pair.ticker in regex_tickers
+            or pair.positive_keypoints
+            or pair.negative_keypoints
+            or pair.neutral_keypoints
+        ]
+        kept = {pair.ticker for pair in pairs}
+        missing = sorted(regex_tickers - kept)
+        if not missing and len(pairs) == len(er.ticker_topic_pairs):
+            return er
+        return ExtractionResult(
+            ticker_topic_pairs=[*pairs, *(TickerTopicPair(ticker=t) for t in missing)],
+            tickers=sorted(kept | regex_tickers),  # legacy field
+        )
+
+    def _finish_single(self, llm_result: Any, regex_tickers: Set[str], cache_key: str) -> ExtractionResult:
+        """Parse/validate a single-chunk LLM reply, falling back to regex tickers."""
 
         if llm_result:
             parsed = self._safe_json(str(llm_result))
@@ -93,6 +596,7 @@ class TickerTopicService:
                     er = ExtractionResult.model_validate(normalized)
                     # Validate we got pairs
                     if er.ticker_topic_pairs:
+                        self._cache_set(cache_key, er)
                         return er
                 except ValidationError as e:
                     logger.warning("Ticker/topic output failed validation: %s", e)
@@ -111,6 +615,134 @@ class TickerTopicService:
             tickers=sorted(regex_tickers),  # legacy field
         )
 
+    def _plan_batch(self, chunks: List[str], batch_size: int) -> "_BatchPlan":
+        """Resolve cache hits/duplicates and render one prompt per batch of pending chunks."""
+
+        size = max(1, batch_size)
+        # Trimmed once: the same text feeds both the cache key and the prompt.
+        trimmed = [self._trim_chunk(c) for c in chunks]
+        cache_keys = [self._cache_key(t) for t in trimmed]
+
+        # Identical chunks (repeated intros/outros, silence) share a cache key; extract
+        # each distinct text once and fan the result out to its duplicates at the end.
+        first_index: Dict[str, int] = {}
+        for i, key in enumerate(cache_keys):
+            first_index.setdefault(key, i)
+        plan = _BatchPlan(
+            regex_tickers=_regex_tickers_many(chunks),
+            cache_keys=cache_keys,
+            first_index=first_index,
+        )
+
+        for i in plan.unique:
+            plan.results[i] = self._cache_get(cache_keys[i])
+            if plan.results[i] is None and self._is_filler(chunks[i], plan.regex_tickers[i]):
+                # Not cached: a later run with a larger universe should still extract it.
+                plan.results[i] = ExtractionResult()
+        pending = plan.missing()
+        plan.batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+
+        for batch in plan.batches:
+            chunks_json = json.dumps(
+                [{"id": j, "text": trimmed[i]} for j, i in enumerate(batch)],
+                ensure_ascii=False,
+            )
+            prompt = self._batch_prompt_head + chunks_json + self._batch_prompt_tail
+            log_llm_prompt_stats(
+                logger,
+                model=self._model,
+                label="ticker_topic_extraction_batch",
+                prompt=prompt,
+                extra={
+                    "chunks_count": len(batch),
+                    "chunks_chars": len(chunks_json),
+                },
+            )
+            plan.prompts.append(prompt)
+        return plan
+
+    def _apply_batch_messages(self, plan: "_BatchPlan", msgs: List[Any]) -> None:
+        """Parse batched LLM replies into `plan.results` (and the cache) by chunk id."""
+
+        for batch, msg in zip(plan.batches, msgs):
+            if msg is None or isinstance(msg, Exception):
+                logger.warning("Ticker/topic batch call failed for %d chunks: %s", len(batch), msg)
+                continue
+
+            # Chat messages from LangChain, or raw content strings from the Batch API.
+            parsed = self._safe_json(msg if isinstance(msg, str) else str(msg.content))
+            raw_results = parsed.get("results") if parsed else None
+            if not isinstance(raw_results, list):
+                logger.warning("Ticker/topic batch output has no results array; falling back per chunk")
+                continue
+
+            by_id: Dict[int, dict] = {}
+            for r in raw_results:
+                if isinstance(r, dict) and isinstance(r.get("id"), int):
+                    by_id.setdefault(r["id"], r)
+
+            for j, i in enumerate(batch):
+                raw = by_id.get(j)
+                if raw is None:
+                    continue
+                try:
+                    er = ExtractionResult.model_validate(
+                        self._normalize_extraction_dict(raw, plan.regex_tickers[i])
+                    )
+                    plan.results[i] = er
+                    self._cache_set(plan.cache_keys[i], er)
+                except ValidationError as e:
+                    logger.warning("Ticker/topic batch item failed validation: %s", e)
+
+    def _is_filler(self, chunk_text: str | None, regex_tickers: Set[str]) -> bool:
+        """True when the universe prefilter is on and the chunk mentions nothing in it."""
+
+        if self._universe is None or regex_tickers:
+            return False
+        return not self._universe.search(chunk_text or "")
+
+    def _trim_chunk(self, chunk_text: str | None) -> str:
+        """Cut chunk text to the per-chunk token budget (on a token boundary)."""
+
+        text = chunk_text or ""
+        if self._encoding is None:
+            return text[:_MAX_CHUNK_CHARS]
+        # Byte-level BPE tokens span at least one UTF-8 byte (not one char: CJK/emoji often
+        # take several tokens each), so text this short in bytes cannot exceed the budget.
+        if len(text.encode("utf-8")) <= _MAX_CHUNK_TOKENS:
+            return text
+        ids = self._encoding.encode(text, disallowed_special=())
+        if len(ids) <= _MAX_CHUNK_TOKENS:
+            return text
+        return self._encoding.decode(ids[:_MAX_CHUNK_TOKENS])
+
+    def _cache_key(self, trimmed: str) -> str:
+        """Cache key for an already `_trim_chunk`-ed chunk text."""
+
+        raw = json.dumps(
+            [self._model, self._temperature, PROMPT_VERSION, trimmed],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> ExtractionResult | None:
+        if self._cache is None:
+            return None
+        try:
+            raw = self._cache.get(key)
+            return ExtractionResult.model_validate_json(raw) if raw else None
+        except Exception:
+            logger.warning("Ignoring unreadable ticker/topic cache entry key=%s", key)
+            return None
+
+    def _cache_set(self, key: str, er: ExtractionResult) -> None:
+        if self._cache is None:
+            return
+        try:
+            self._cache.set(key, er.model_dump_json(), expire=_CACHE_TTL_SECONDS)
+        except Exception:
+            logger.warning("Failed to write ticker/topic cache entry key=%s", key)
+
     @staticmethod
     def _normalize_extraction_dict(payload: dict, regex_tickers: Set[str]) -> dict:
         """Normalize a loosely-correct LLM payload into the expected schema.
@@ -138,7 +770,7 @@ class TickerTopicService:
                 # Allow 'MARKET' as a special ticker for macro/market-wide topics
                 if ticker == "MARKET":
                     pass  # Valid special ticker
-                elif not ticker or not re.fullmatch(r"[A-Z]{1,5}", ticker):
+                elif not ticker or not _TICKER_SYMBOL_RE.fullmatch(ticker):
                     continue
                 
                 # Deduplicate tickers within same chunk
@@ -197,6 +829,13 @@ class TickerTopicService:
         if not text:
             return None
 
+        # Fast path: JSON mode means the reply is normally a bare object.
+        try:
+            parsed = json.loads(text)
+            return parsed if isinstance(parsed, dict) else None
+        except json.JSONDecodeError:
+            pass
+
         # Strip any accidental leading/trailing prose
         first = text.find("{")
         last = text.rfind("}")
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
@@ -17,18 +19,47 @@ from app.models.schemas import TranscriptEntry
 logger = logging.getLogger(__name__)
 
 
+def _get_item(row: dict, key: str, default: Any = None) -> Any:
+    return row.get(key, default)
+
+
 class TranscriptService:
     """Fetch transcripts with timestamps via youtube-transcript-api."""
 
     _MIN_SLEEP_SECONDS = 1.5
     _MAX_SLEEP_SECONDS = 2.5
 
+    # Shared across instances/threads so throttling is global, not per call.
+    _throttle_lock = threading.Lock()
+    _next_ok = 0.0
+
+    def fetch_transcripts(
+        self,
+        video_ids: list[str],
+        *,
+        languages: Optional[list[str]] = None,
+        max_workers: int = 4,
+    ) -> dict[str, list[TranscriptEntry]]:
+        """Fetch transcripts for many videos concurrently (bounded thread pool).
+
+        The work is network-bound, so a few worker threads overlap the per-video
+        round trips and throttling waits. Returns video_id -> entries ([] when missing).
+        """
+
+        if not video_ids:
+            return {}
+
+        def fetch_one(video_id: str) -> list[TranscriptEntry]:
+            return self.fetch_transcript(video_id, languages=languages)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(video_ids)))) as ex:
+            return dict(zip(video_ids, ex.map(fetch_one, video_ids)))
+
     def fetch_transcript(self, video_id: str, *, languages: Optional[list[str]] = None) -> list[TranscriptEntry]:
         languages = languages or ["en"]
 
         # Simple throttling to reduce chances of YouTube blocking your IP.
-        # (Keep values fixed per your request; adjust here if needed.)
-        time.sleep(random.uniform(self._MIN_SLEEP_SECONDS, self._MAX_SLEEP_SECONDS))
+        self._throttle()
 
         try:
             # NOTE: youtube-transcript-api can return an iterable that performs
@@ -44,34 +75,42 @@ class TranscriptService:
             logger.warning("Error fetching transcript for video_id=%s: %s", video_id, exc)
             transcript = None
 
-        time.sleep(random.uniform(self._MIN_SLEEP_SECONDS, self._MAX_SLEEP_SECONDS))
-
-
-        if transcript is None:
+        if not transcript:
             return []
 
+        # Rows are homogeneous (snippet objects, or dicts from older library versions):
+        # pick the accessor once instead of probing both per row.
+        get = _get_item if isinstance(transcript[0], dict) else getattr
+
         entries: list[TranscriptEntry] = []
-        for row in transcript:
-            try:
-                start = getattr(row, "start", None)
-                duration = getattr(row, "duration", None)
-                text = getattr(row, "text", None)
-
-                if isinstance(row, dict):
-                    start = row.get("start", start)
-                    duration = row.get("duration", duration)
-                    text = row.get("text", text)
-
-                entries.append(
-                    TranscriptEntry(
-                        start=float(start or 0.0),
-                        duration=float(duration or 0.0),
-                        text=str(text or "").strip(),
+        append = entries.append
+        # Missing values are already handled by `or` defaults; only a truly malformed
+        # transcript (non-numeric timestamps) can raise, so guard the loop once, not per row.
+        try:
+            for row in transcript:
+                text = str(get(row, "text", None) or "").strip()
+                if not text:
+                    continue
+                # Values are already coerced (float/float/stripped str); skip per-row validation.
+                append(
+                    TranscriptEntry.model_construct(
+                        start=float(get(row, "start", None) or 0.0),
+                        duration=float(get(row, "duration", None) or 0.0),
+                        text=text,
                     )
                 )
-            except Exception:
-                continue
+        except (TypeError, ValueError, AttributeError) as exc:
+            logger.warning("Malformed transcript for video_id=%s: %s", video_id, exc)
+            return []
 
-        # Filter blanks
-        entries = [e for e in entries if e.text]
         return entries
+
+    @classmethod
+    def _throttle(cls) -> None:
+        """Keep a jittered 1.5-2.5s gap between fetch starts, waiting only for what's left of it."""
+
+        with cls._throttle_lock:
+            wait = cls._next_ok - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            cls._next_ok = time.monotonic() + random.uniform(cls._MIN_SLEEP_SECONDS, cls._MAX_SLEEP_SECONDS)
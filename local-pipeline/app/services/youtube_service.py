@@ -1,18 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-import re
+import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import requests
+import httpx
+import orjson
 
+from app.core.cache import SqliteCache
 from app.models.schemas import VideoMetadata
 
 logger = logging.getLogger(__name__)
 
 
+if sys.version_info >= (3, 11):
+    # 3.11+ parses the trailing "Z" natively; no per-item string copy needed.
+    _parse_iso_datetime = datetime.fromisoformat
+else:
+
+    def _parse_iso_datetime(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _safe_int(value: object) -> Optional[int]:
+    """Parse YouTube's stringly-typed counters; None when absent or malformed."""
+
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value))
+    except Exception:
+        return None
+
+
 @dataclass(frozen=True)
 class YouTubeSearchQuery:
     query: str
@@ -33,24 +60,37 @@ class YouTubeService:
     VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
     CHANNELS_URL = "https://www.googleapis.com/youtube/v3/channels"
 
-    _ISO8601_DURATION_RE = re.compile(
-        r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+    # Partial responses: only the leaves the parsers read (smaller payloads, faster parse).
+    _SEARCH_FIELDS = "items(id(kind,videoId),snippet(publishedAt,channelId,title,channelTitle,description))"
+    _VIDEO_FIELDS = (
+        "items(id,contentDetails/duration,statistics(viewCount,likeCount,commentCount),"
+        "snippet(channelId,channelTitle,tags,categoryId,defaultLanguage,defaultAudioLanguage,"
+        "thumbnails(maxres/url,standard/url,high/url,medium/url,default/url)))"
     )
+    _CHANNEL_FIELDS = "items(id,statistics(subscriberCount,videoCount))"
 
-    @staticmethod
-    def _to_int(value: object) -> Optional[int]:
-        if value is None:
-            return None
-        try:
-            return int(str(value))
-        except Exception:
-            return None
+    _CHANNEL_CACHE_TTL_SECONDS = 6 * 3600
 
-    def __init__(self, api_key: str, session: Optional[requests.Session] = None) -> None:
+    # Status-level retries (httpx transport retries only cover connect errors).
+    _RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    _MAX_STATUS_RETRIES = 3
+    _RETRY_BACKOFF_SECONDS = 0.3
+
+    # ISO 8601 duration designators YouTube uses (date part / time part).
+    _DURATION_DATE_UNITS = {"D": 86400}
+    _DURATION_TIME_UNITS = {"H": 3600, "M": 60, "S": 1}
+
+    def __init__(
+        self,
+        api_key: str,
+        cache: SqliteCache | None = None,
+    ) -> None:
         self._api_key = api_key
-        self._session = session or requests.Session()
+        # Channel stats change slowly and the same finance channels recur across queries/runs.
+        self._channel_cache: Dict[str, Tuple[float, Dict[str, Optional[int]]]] = {}
+        self._cache = cache
 
-    def discover_daily_videos(
+    async def discover_daily_videos_async(
         self,
         queries: Iterable[YouTubeSearchQuery],
         *,
@@ -61,113 +101,227 @@ class YouTubeService:
         min_duration_seconds: int = 2 * 60,
         max_duration_seconds: int = 60 * 60,
     ) -> List[VideoMetadata]:
-        published_after = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
-
-        collected: Dict[str, VideoMetadata] = {}
+        """Discover videos, fanning the YouTube requests out concurrently.
 
-        for q in queries:
-            if len(collected) >= max_videos:
-                break
+        All searches run at once; then video details and channel details (channel ids
+        come from the search snippets) are fetched together over one HTTP/2 client.
+        Selection follows query order, then result order, up to `max_videos`.
+        Note: every query is searched even if the first fills the quota.
+        """
 
-            items = self._search_youtube(
-                query=q.query,
-                published_after=published_after,
-                language=language,
-                region_code=region_code,
-                max_results=max_videos,
+        published_after = (datetime.now(timezone.utc) - timedelta(hours=lookback_hours)).isoformat()
+        queries = list(queries)
+        if not queries or max_videos <= 0:
+            return []
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=20),
+            retries=3,  # connection-level retries (TLS/connect failures); status retries in _get_json_async
+        )
+        async with httpx.AsyncClient(transport=transport, timeout=30) as client:
+            searches = await asyncio.gather(
+                *[
+                    self._search_youtube_async(
+                        client,
+                        query=q.query,
+                        published_after=published_after,
+                        language=language,
+                        region_code=region_code,
+                        max_results=max_videos,
+                    )
+                    for q in queries
+                ]
             )
 
-            new_ids = [v.video_id for v in items if v.video_id not in collected]
-            details = self._fetch_video_details(new_ids)
-
+            candidate_ids: Dict[str, None] = {}
             channel_ids_set: set[str] = set()
-            for d in details.values():
-                channel_id = d.get("channel_id")
-                if isinstance(channel_id, str) and channel_id:
-                    channel_ids_set.add(channel_id)
-
-            channel_ids = sorted(channel_ids_set)
-            channel_details = self._fetch_channel_details(channel_ids)
+            for items, channel_by_video in searches:
+                for v in items:
+                    candidate_ids.setdefault(v.video_id, None)
+                channel_ids_set.update(channel_by_video.values())
+            video_ids = list(candidate_ids)
+
+            details, channel_details = await asyncio.gather(
+                self._fetch_video_details_async(client, video_ids),
+                self._fetch_channel_details_async(client, sorted(channel_ids_set)),
+            )
 
+        collected: Dict[str, VideoMetadata] = {}
+        for items, _ in searches:
             for v in items:
-                d: Dict[str, Any] = details.get(v.video_id) or {}
-
-                duration_seconds = d.get("duration_seconds")
-                if not isinstance(duration_seconds, int):
-                    duration_seconds = None
-                if duration_seconds is None:
-                    continue
-
-                if duration_seconds < min_duration_seconds or duration_seconds > max_duration_seconds:
+                if v.video_id in collected:
                     continue
-
-                channel_id = d.get("channel_id")
-                if not isinstance(channel_id, str):
-                    channel_id = None
-
-                ch = channel_details.get(channel_id) if channel_id else None
-
-                v = v.model_copy(
-                    update={
-                        "duration_seconds": duration_seconds,
-                        # Persist only `channel` in the videos table.
-                        "channel": d.get("channel_title") or v.channel,
-                        "video_url": d.get("video_url"),
-                        "thumbnail_url": d.get("thumbnail_url"),
-                        "view_count": d.get("view_count"),
-                        "like_count": d.get("like_count"),
-                        "comment_count": d.get("comment_count"),
-                        "tags": d.get("tags"),
-                        "category_id": d.get("category_id"),
-                        "default_language": d.get("default_language"),
-                        "default_audio_language": d.get("default_audio_language"),
-                        "channel_subscriber_count": (ch or {}).get("subscriber_count"),
-                        "channel_video_count": (ch or {}).get("video_count"),
-                    }
+                merged = self._merge_video_details(
+                    v,
+                    details.get(v.video_id) or {},
+                    channel_details,
+                    min_duration_seconds=min_duration_seconds,
+                    max_duration_seconds=max_duration_seconds,
                 )
-                collected.setdefault(v.video_id, v)
+                if merged is None:
+                    continue
+                collected[merged.video_id] = merged
                 if len(collected) >= max_videos:
-                    break
+                    return list(collected.values())
 
-        videos = list(collected.values())[:max_videos]
+        return list(collected.values())
 
-        return videos
-
-    def _search_youtube(
+    async def _search_youtube_async(
         self,
+        client: httpx.AsyncClient,
         *,
         query: str,
         published_after: str,
         language: str,
         region_code: str,
         max_results: int,
-    ) -> List[VideoMetadata]:
-        safe_max_results = min(max_results, 50)
+    ) -> Tuple[List[VideoMetadata], Dict[str, str]]:
         params = {
             "key": self._api_key,
             "part": "snippet",
             "q": query,
             "type": "video",
             "order": "relevance",
-            "maxResults": str(safe_max_results),
+            "maxResults": str(min(max_results, 50)),
             "safeSearch": "moderate",
             "regionCode": region_code,
             "relevanceLanguage": language,
             "publishedAfter": published_after,
+            "fields": self._SEARCH_FIELDS,
         }
+        return self._parse_search_payload(await self._get_json_async(client, self.BASE_URL, params, label="search"))
+
+    async def _fetch_video_details_async(
+        self,
+        client: httpx.AsyncClient,
+        video_ids: List[str],
+    ) -> Dict[str, Dict[str, Any]]:
+        async def fetch(chunk: List[str]) -> Dict[str, Any]:
+            params = {
+                "key": self._api_key,
+                "part": "snippet,contentDetails,statistics",
+                "id": ",".join(chunk),
+                "fields": self._VIDEO_FIELDS,
+            }
+            return await self._get_json_async(client, self.VIDEOS_URL, params, label="videos.list")
+
+        out: Dict[str, Dict[str, Any]] = {}
+        if not video_ids:
+            return out
+        payloads = await asyncio.gather(*[fetch(c) for c in self._chunk(video_ids, chunk_size=50)])
+        for payload in payloads:
+            self._parse_video_details_payload(payload, out)
+        return out
+
+    async def _fetch_channel_details_async(
+        self,
+        client: httpx.AsyncClient,
+        channel_ids: List[str],
+    ) -> Dict[str, Dict[str, Optional[int]]]:
+        async def fetch(chunk: List[str]) -> Dict[str, Any]:
+            params = {
+                "key": self._api_key,
+                "part": "statistics",
+                "id": ",".join(chunk),
+                "fields": self._CHANNEL_FIELDS,
+            }
+            return await self._get_json_async(client, self.CHANNELS_URL, params, label="channels.list")
+
+        out, missing = self._cached_channel_details(channel_ids)
+        if not missing:
+            return out
+        fetched: Dict[str, Dict[str, Optional[int]]] = {}
+        payloads = await asyncio.gather(*[fetch(c) for c in self._chunk(missing, chunk_size=50)])
+        for payload in payloads:
+            self._parse_channel_details_payload(payload, fetched)
+        self._remember_channel_details(fetched)
+        out.update(fetched)
+        return out
+
+    async def _get_json_async(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict[str, str],
+        *,
+        label: str,
+    ) -> Dict[str, Any]:
+        """GET a Data API endpoint, retrying 429/5xx with backoff (honoring Retry-After)."""
+
+        for attempt in range(self._MAX_STATUS_RETRIES + 1):
+            resp = await client.get(url, params=params)
+            if resp.status_code not in self._RETRY_STATUSES or attempt == self._MAX_STATUS_RETRIES:
+                break
+            delay = self._RETRY_BACKOFF_SECONDS * (2**attempt)
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    delay = max(0.0, float(retry_after))
+                except ValueError:
+                    pass
+            logger.warning("YouTube %s returned %s; retrying in %.1fs", label, resp.status_code, delay)
+            await asyncio.sleep(delay)
 
-        resp = self._session.get(self.BASE_URL, params=params, timeout=30)
         try:
             resp.raise_for_status()
-        except requests.HTTPError:
-            logger.exception("YouTube search failed: %s", resp.text)
+        except httpx.HTTPStatusError:
+            logger.exception("YouTube %s failed: %s", label, resp.text)
             raise
+        return orjson.loads(resp.content)
 
-        payload = resp.json()
-        items = payload.get("items", [])
+    def _merge_video_details(
+        self,
+        v: VideoMetadata,
+        d: Dict[str, Any],
+        channel_details: Dict[str, Dict[str, Optional[int]]],
+        *,
+        min_duration_seconds: int,
+        max_duration_seconds: int,
+    ) -> Optional[VideoMetadata]:
+        """Attach videos.list/channels.list details; None if the video fails the duration filter."""
+
+        duration_seconds = d.get("duration_seconds")
+        if not isinstance(duration_seconds, int):
+            duration_seconds = None
+        if duration_seconds is None:
+            return None
+
+        if duration_seconds < min_duration_seconds or duration_seconds > max_duration_seconds:
+            return None
+
+        channel_id = d.get("channel_id")
+        if not isinstance(channel_id, str):
+            channel_id = None
+
+        ch = channel_details.get(channel_id) if channel_id else None
+
+        return v.model_copy(
+            update={
+                "duration_seconds": duration_seconds,
+                # Persist only `channel` in the videos table.
+                "channel": d.get("channel_title") or v.channel,
+                "video_url": d.get("video_url"),
+                "thumbnail_url": d.get("thumbnail_url"),
+                "view_count": d.get("view_count"),
+                "like_count": d.get("like_count"),
+                "comment_count": d.get("comment_count"),
+                "tags": d.get("tags"),
+                "category_id": d.get("category_id"),
+                "default_language": d.get("default_language"),
+                "default_audio_language": d.get("default_audio_language"),
+                "channel_subscriber_count": (ch or {}).get("subscriber_count"),
+                "channel_video_count": (ch or {}).get("video_count"),
+            }
+        )
+
+    @staticmethod
+    def _parse_search_payload(payload: Dict[str, Any]) -> Tuple[List[VideoMetadata], Dict[str, str]]:
+        """Parse `search.list` items into (videos, video_id -> channel_id)."""
 
         results: List[VideoMetadata] = []
-        for item in items:
+        channel_by_video: Dict[str, str] = {}
+        for item in payload.get("items", []) or []:
             id_block = item.get("id") or {}
             snippet = item.get("snippet") or {}
             if id_block.get("kind") != "youtube#video":
@@ -182,7 +336,7 @@ class YouTubeService:
                 continue
 
             try:
-                published_at = datetime.fromisoformat(published_at_raw.replace("Z", "+00:00"))
+                published_at = _parse_iso_datetime(published_at_raw)
             except ValueError:
                 continue
 
@@ -195,126 +349,145 @@ class YouTubeService:
                     description=snippet.get("description") or "",
                 )
             )
+            channel_id = snippet.get("channelId")
+            if isinstance(channel_id, str) and channel_id:
+                channel_by_video[video_id] = channel_id
 
-        return results
-
-    def _fetch_video_details(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Fetch rich metadata for videos.
+        return results, channel_by_video
 
-        Uses `videos.list` with parts:
-        - snippet (title, channelId, channelTitle, description, thumbnails, tags, categoryId, languages)
-        - contentDetails (duration)
-        - statistics (view/like/comment counts)
-        """
-        if not video_ids:
-            return {}
-
-        out: Dict[str, Dict[str, Any]] = {}
-
-        for chunk in self._chunk(video_ids, chunk_size=50):
-            params = {
-                "key": self._api_key,
-                "part": "snippet,contentDetails,statistics",
-                "id": ",".join(chunk),
-            }
-
-            resp = self._session.get(self.VIDEOS_URL, params=params, timeout=30)
-            try:
-                resp.raise_for_status()
-            except requests.HTTPError:
-                logger.exception("YouTube videos.list failed: %s", resp.text)
-                raise
-
-            payload = resp.json()
-            for item in payload.get("items", []) or []:
-                video_id = item.get("id")
-                if not video_id:
-                    continue
+    def _parse_video_details_payload(self, payload: Dict[str, Any], out: Dict[str, Dict[str, Any]]) -> None:
+        """Parse `videos.list` items into `out` (video_id -> flattened details)."""
 
-                snippet = item.get("snippet") or {}
-                content_details = item.get("contentDetails") or {}
-                statistics = item.get("statistics") or {}
-
-                duration_raw = content_details.get("duration")
-                duration_seconds = (
-                    self._parse_iso8601_duration_seconds(duration_raw) if isinstance(duration_raw, str) else None
-                )
-
-                thumbnails = snippet.get("thumbnails") or {}
-                thumb_url = (
-                    ((thumbnails.get("maxres") or {}).get("url"))
-                    or ((thumbnails.get("standard") or {}).get("url"))
-                    or ((thumbnails.get("high") or {}).get("url"))
-                    or ((thumbnails.get("medium") or {}).get("url"))
-                    or ((thumbnails.get("default") or {}).get("url"))
-                )
+        for item in payload.get("items", []) or []:
+            video_id = item.get("id")
+            if not video_id:
+                continue
 
-                out[video_id] = {
-                    "duration_seconds": duration_seconds,
-                    "channel_id": snippet.get("channelId"),
-                    "channel_title": snippet.get("channelTitle"),
-                    "video_url": f"https://www.youtube.com/watch?v={video_id}",
-                    "thumbnail_url": thumb_url,
-                    "view_count": self._to_int(statistics.get("viewCount")),
-                    "like_count": self._to_int(statistics.get("likeCount")),
-                    "comment_count": self._to_int(statistics.get("commentCount")),
-                    "tags": snippet.get("tags") if isinstance(snippet.get("tags"), list) else None,
-                    "category_id": snippet.get("categoryId"),
-                    "default_language": snippet.get("defaultLanguage"),
-                    "default_audio_language": snippet.get("defaultAudioLanguage"),
-                }
+            snippet = item.get("snippet") or {}
+            content_details = item.get("contentDetails") or {}
+            statistics = item.get("statistics") or {}
 
-        return out
+            duration_raw = content_details.get("duration")
+            duration_seconds = (
+                self._parse_iso8601_duration_seconds(duration_raw) if isinstance(duration_raw, str) else None
+            )
 
-    def _fetch_channel_details(self, channel_ids: List[str]) -> Dict[str, Dict[str, Optional[int]]]:
-        """Fetch channel-level metadata like subscriber count.
+            thumbnails = snippet.get("thumbnails") or {}
+            thumb_url = (
+                ((thumbnails.get("maxres") or {}).get("url"))
+                or ((thumbnails.get("standard") or {}).get("url"))
+                or ((thumbnails.get("high") or {}).get("url"))
+                or ((thumbnails.get("medium") or {}).get("url"))
+                or ((thumbnails.get("default") or {}).get("url"))
+            )
 
-        Note: subscriberCount may be hidden for some channels; in that case it's absent.
-        """
-        if not channel_ids:
-            return {}
+            out[video_id] = {
+                "duration_seconds": duration_seconds,
+                "channel_id": snippet.get("channelId"),
+                "channel_title": snippet.get("channelTitle"),
+                "video_url": f"https://www.youtube.com/watch?v={video_id}",
+                "thumbnail_url": thumb_url,
+                "view_count": _safe_int(statistics.get("viewCount")),
+                "like_count": _safe_int(statistics.get("likeCount")),
+                "comment_count": _safe_int(statistics.get("commentCount")),
+                "tags": snippet.get("tags") if isinstance(snippet.get("tags"), list) else None,
+                "category_id": snippet.get("categoryId"),
+                "default_language": snippet.get("defaultLanguage"),
+                "default_audio_language": snippet.get("defaultAudioLanguage"),
+            }
 
-        out: Dict[str, Dict[str, Optional[int]]] = {}
+    def _parse_channel_details_payload(
+        self,
+        payload: Dict[str, Any],
+        out: Dict[str, Dict[str, Optional[int]]],
+    ) -> None:
+        """Parse `channels.list` items into `out` (channel_id -> counts)."""
+
+        for item in payload.get("items", []) or []:
+            channel_id = item.get("id")
+            if not channel_id:
+                continue
+            statistics = item.get("statistics") or {}
 
-        for chunk in self._chunk(channel_ids, chunk_size=50):
-            params = {
-                "key": self._api_key,
-                "part": "statistics",
-                "id": ",".join(chunk),
+            out[channel_id] = {
+                "subscriber_count": _safe_int(statistics.get("subscriberCount")),
+                "video_count": _safe_int(statistics.get("videoCount")),
             }
 
-            resp = self._session.get(self.CHANNELS_URL, params=params, timeout=30)
-            try:
-                resp.raise_for_status()
-            except requests.HTTPError:
-                logger.exception("YouTube channels.list failed: %s", resp.text)
-                raise
-
-            payload = resp.json()
-            for item in payload.get("items", []) or []:
-                channel_id = item.get("id")
-                if not channel_id:
+    def _cached_channel_details(
+        self,
+        channel_ids: List[str],
+    ) -> Tuple[Dict[str, Dict[str, Optional[int]]], List[str]]:
+        """Split channel ids into (fresh cached details, ids that still need fetching)."""
+
+        now = time.monotonic()
+        hits: Dict[str, Dict[str, Optional[int]]] = {}
+        missing: List[str] = []
+        for channel_id in dict.fromkeys(channel_ids):
+            entry = self._channel_cache.get(channel_id)
+            if entry is not None and entry[0] > now:
+                hits[channel_id] = entry[1]
+                continue
+
+            stored = self._cache.get(self._channel_cache_key(channel_id)) if self._cache is not None else None
+            if stored:
+                try:
+                    details = json.loads(stored)
+                except ValueError:
+                    details = None
+                if isinstance(details, dict):
+                    hits[channel_id] = details
+                    self._channel_cache[channel_id] = (now + self._CHANNEL_CACHE_TTL_SECONDS, details)
                     continue
-                statistics = item.get("statistics") or {}
 
-                out[channel_id] = {
-                    "subscriber_count": self._to_int(statistics.get("subscriberCount")),
-                    "video_count": self._to_int(statistics.get("videoCount")),
-                }
+            missing.append(channel_id)
+        return hits, missing
+
+    def _remember_channel_details(self, details: Dict[str, Dict[str, Optional[int]]]) -> None:
+        expires_at = time.monotonic() + self._CHANNEL_CACHE_TTL_SECONDS
+        for channel_id, d in details.items():
+            self._channel_cache[channel_id] = (expires_at, d)
+            if self._cache is not None:
+                try:
+                    self._cache.set(
+                        self._channel_cache_key(channel_id),
+                        json.dumps(d),
+                        expire=self._CHANNEL_CACHE_TTL_SECONDS,
+                    )
+                except Exception:
+                    logger.warning("Failed to cache channel details channel_id=%s", channel_id)
 
-        return out
+    @staticmethod
+    def _channel_cache_key(channel_id: str) -> str:
+        return f"youtube:channel:{channel_id}"
 
     def _parse_iso8601_duration_seconds(self, raw: str) -> Optional[int]:
         # YouTube returns ISO 8601 duration like: PT2M10S, PT1H3M, P1DT2H
-        m = self._ISO8601_DURATION_RE.match(raw)
-        if not m:
+        # Single linear scan; anything outside P[nD][T[nH][nM][nS]] yields None.
+        if not raw or raw[0] != "P":
             return None
 
-        days = int(m.group("days") or 0)
-        hours = int(m.group("hours") or 0)
-        minutes = int(m.group("minutes") or 0)
-        seconds = int(m.group("seconds") or 0)
-        return days * 86400 + hours * 3600 + minutes * 60 + seconds
+        units = self._DURATION_DATE_UNITS
+        total = 0
+        num = -1  # -1 => no digits pending
+        # Designators must appear at most once and in D < H < M < S order; their
+        # multipliers are strictly decreasing in that order.
+        last_mult = 1 << 62
+        for c in raw[1:]:
+            if "0" <= c <= "9":
+                num = (num if num >= 0 else 0) * 10 + (ord(c) - 48)
+            elif c == "T" and units is self._DURATION_DATE_UNITS and num < 0:
+                units = self._DURATION_TIME_UNITS
+            else:
+                mult = units.get(c)
+                if mult is None or num < 0 or mult >= last_mult:
+                    return None
+                last_mult = mult
+                total += num * mult
+                num = -1
+        if num >= 0:
+            return None
+        return total
 
     def _chunk(self, items: List[str], *, chunk_size: int) -> List[List[str]]:
         return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
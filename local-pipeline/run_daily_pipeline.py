@@ -1,25 +1,58 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import io
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
+from pydantic import TypeAdapter
+
+from app.core.cache import SqliteCache
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.core.rate_limit import RateLimiter
+from app.core.semantic_cache import SemanticCache
 from app.db.supabase_client import SupabaseDB
+from app.models.schemas import (
+    AggregatedSummary,
+    DailyMover,
+    ExtractionResult,
+    TranscriptChunk,
+    TranscriptEntry,
+    VideoEvent,
+    VideoMetadata,
+    VideoMover,
+)
 from app.services.chunking_service import ChunkingService
 from app.services.embedding_service import EmbeddingService
 from app.services.summarization_service import SummarizationService
-from app.services.ticker_topic_service import TickerTopicService
+from app.services.ticker_topic_service import TickerTopicService, load_ticker_universe
 from app.services.transcript_service import TranscriptService
 from app.services.youtube_service import YouTubeSearchQuery, YouTubeService
 
 logger = logging.getLogger(__name__)
 
+# Keys of the current keypoint format; rows without any of them use the legacy bull/bear layout.
+_NEW_KEYS = frozenset(("positive", "negative", "neutral"))
+
+# One compiled serializer per list type instead of a `.model_dump()` call per item.
+_VIDEO_EVENTS_ADAPTER = TypeAdapter(list[VideoEvent])
+_VIDEO_MOVERS_ADAPTER = TypeAdapter(list[VideoMover])
+_DAILY_MOVERS_ADAPTER = TypeAdapter(list[DailyMover])
+
+# (markdown heading, summary key) per format, in display order.
+_SECTIONS_NEW = (("**Positive**", "positive"), ("**Negative**", "negative"), ("**Neutral**", "neutral"))
+_SECTIONS_OLD = (("**Bull case**", "bull_case"), ("**Bear case**", "bear_case"), ("**Risks**", "risks"))
 
-def _add_unique_strings(target: list[str], items: Any, *, max_items: int) -> None:
-    """Append unique, non-empty strings from items into target up to max_items."""
+
+def _add_unique_strings(target: list[str], seen: set[str], items: Any, *, max_items: int) -> None:
+    """Append unique, non-empty strings from items into target up to max_items.
+
+    `seen` mirrors `target` so membership checks are O(1) instead of list scans.
+    """
 
     if not isinstance(items, list):
         return
@@ -28,10 +61,10 @@ def _add_unique_strings(target: list[str], items: Any, *, max_items: int) -> Non
         if len(target) >= max_items:
             return
         sx = str(x).strip()
-        if not sx:
+        if not sx or sx in seen:
             continue
-        if sx not in target:
-            target.append(sx)
+        seen.add(sx)
+        target.append(sx)
 
 
 def _aggregate_keypoints(keypoints_list: list[dict[str, Any]]) -> dict[str, Any]:
@@ -40,14 +73,21 @@ def _aggregate_keypoints(keypoints_list: list[dict[str, Any]]) -> dict[str, Any]
     positive: list[str] = []
     negative: list[str] = []
     neutral: list[str] = []
+    pos_seen: set[str] = set()
+    neg_seen: set[str] = set()
+    neu_seen: set[str] = set()
 
     for kp_dict in keypoints_list:
         if not isinstance(kp_dict, dict):
             continue
 
-        _add_unique_strings(positive, kp_dict.get("positive", []), max_items=10)
-        _add_unique_strings(negative, kp_dict.get("negative", []), max_items=10)
-        _add_unique_strings(neutral, kp_dict.get("neutral", []), max_items=10)
+        _add_unique_strings(positive, pos_seen, kp_dict.get("positive", []), max_items=10)
+        _add_unique_strings(negative, neg_seen, kp_dict.get("negative", []), max_items=10)
+        _add_unique_strings(neutral, neu_seen, kp_dict.get("neutral", []), max_items=10)
+
+        # Every category is capped; the remaining chunks cannot change the result.
+        if len(positive) >= 10 and len(negative) >= 10 and len(neutral) >= 10:
+            break
 
     return {
         "positive": positive,
@@ -56,51 +96,49 @@ def _aggregate_keypoints(keypoints_list: list[dict[str, Any]]) -> dict[str, Any]
     }
 
 
-def _derive_video_summary(*, video_id: str, summary_rows: list[dict[str, Any]]) -> dict[str, Any] | None:
+def _derive_video_summary(
+    *, video_id: str, summary_rows: list[dict[str, Any]], now_iso: str | None = None
+) -> dict[str, Any] | None:
     """Create a lightweight per-video summary from aggregated (ticker) rows."""
 
     rows = [r for r in (summary_rows or []) if isinstance(r, dict)]
     if not rows:
         return None
 
-    tickers = sorted({(r.get("ticker") or "").strip().upper() for r in rows if r.get("ticker")})
-
+    ticker_set: set[str] = set()
     key_points: list[str] = []
     opportunities: list[str] = []
     risks: list[str] = []
+    opp_seen: set[str] = set()
+    risk_seen: set[str] = set()
     md_lines: list[str] = []
 
     for r in rows:
         ticker = (r.get("ticker") or "").strip().upper()
+        if ticker:
+            ticker_set.add(ticker)
         summary_obj = r.get("summary") or {}
-        if any(k in summary_obj for k in ("positive", "negative", "neutral")):
-            sections = [
-                ("**Positive**", summary_obj.get("positive") or []),
-                ("**Negative**", summary_obj.get("negative") or []),
-                ("**Neutral**", summary_obj.get("neutral") or []),
-            ]
-        else:
-            sections = [
-                ("**Bull case**", summary_obj.get("bull_case") or []),
-                ("**Bear case**", summary_obj.get("bear_case") or []),
-                ("**Risks**", summary_obj.get("risks") or []),
-            ]
+        is_new_format = not _NEW_KEYS.isdisjoint(summary_obj)
 
         md_lines.append(f"## {ticker}".strip())
-        for title, items in sections:
+        for title, key in _SECTIONS_NEW if is_new_format else _SECTIONS_OLD:
+            items = summary_obj.get(key) or []
             if items:
                 md_lines.append(title)
-                md_lines.extend(f"- {x}" for x in items)
-                key_points.extend(str(x) for x in items)
+                md_lines.extend([f"- {x}" for x in items])
+                key_points.extend([str(x) for x in items])
         md_lines.append("")
 
-        if any(k in summary_obj for k in ("positive", "negative", "neutral")):
-            _add_unique_strings(opportunities, summary_obj.get("positive") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("negative") or [], max_items=12)
+        # Markdown still covers every row, but once both lists are capped the dedupe work is moot.
+        if len(opportunities) >= 12 and len(risks) >= 12:
+            continue
+        if is_new_format:
+            _add_unique_strings(opportunities, opp_seen, summary_obj.get("positive") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("negative") or [], max_items=12)
         else:
-            _add_unique_strings(opportunities, summary_obj.get("bull_case") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("risks") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("bear_case") or [], max_items=12)
+            _add_unique_strings(opportunities, opp_seen, summary_obj.get("bull_case") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("risks") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("bear_case") or [], max_items=12)
 
     return {
         "video_id": video_id,
@@ -109,77 +147,80 @@ def _derive_video_summary(*, video_id: str, summary_rows: list[dict[str, Any]])
         "risks": risks,
         "opportunities": opportunities,
         "key_points": key_points[:12],
-        "tickers": tickers,
+        "tickers": sorted(ticker_set),
         "sentiment": None,
         "model": "derived-from-summaries",
-        "summarized_at": datetime.now(timezone.utc).isoformat(),
+        "summarized_at": now_iso or datetime.now(timezone.utc).isoformat(),
     }
 
 
-def _derive_daily_summary(*, market_date: date, rows: list[dict[str, Any]]) -> dict[str, Any] | None:
+def _derive_daily_summary(
+    *, market_date: date, rows: list[dict[str, Any]], now_iso: str | None = None
+) -> dict[str, Any] | None:
     """Create a daily market summary derived from aggregated (video,ticker) summaries."""
 
     if not rows:
         return None
 
-    ticker_counts: dict[str, int] = {}
+    ticker_counts: Counter[str] = Counter()
     opportunities: list[str] = []
     risks: list[str] = []
+    opp_seen: set[str] = set()
+    risk_seen: set[str] = set()
 
-    md_lines: list[str] = [f"# Market Summary — {market_date.isoformat()}", ""]
+    # Daily inputs can reach thousands of rows; write lines straight into one buffer.
+    buf = io.StringIO()
+    write = buf.write
+    write(f"# Market Summary — {market_date.isoformat()}\n\n")
 
     for r in rows:
         if not isinstance(r, dict):
             continue
         ticker = (r.get("ticker") or "").strip().upper()
-        summary_obj = r.get("summary") or {}
         if not ticker:
             continue
+        summary_obj = r.get("summary") or {}
 
-        ticker_counts[ticker] = ticker_counts.get(ticker, 0) + 1
+        ticker_counts[ticker] += 1
 
-        if any(k in summary_obj for k in ("positive", "negative", "neutral")):
-            sections = [
-                ("**Positive**", summary_obj.get("positive") or []),
-                ("**Negative**", summary_obj.get("negative") or []),
-                ("**Neutral**", summary_obj.get("neutral") or []),
-            ]
-        else:
-            sections = [
-                ("**Bull case**", summary_obj.get("bull_case") or []),
-                ("**Bear case**", summary_obj.get("bear_case") or []),
-                ("**Risks**", summary_obj.get("risks") or []),
-            ]
-
-        md_lines.append(f"## {ticker}")
-        for title, items in sections:
+        is_new_format = not _NEW_KEYS.isdisjoint(summary_obj)
+
+        write(f"## {ticker}\n")
+        for title, key in _SECTIONS_NEW if is_new_format else _SECTIONS_OLD:
+            items = summary_obj.get(key) or []
             if items:
-                md_lines.append(title)
-                md_lines.extend(f"- {x}" for x in items)
-        md_lines.append("")
+                write(f"{title}\n")
+                for x in items:
+                    write(f"- {x}\n")
+        write("\n")
 
-        if any(k in summary_obj for k in ("positive", "negative", "neutral")):
-            _add_unique_strings(opportunities, summary_obj.get("positive") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("negative") or [], max_items=12)
+        # Markdown still covers every row, but once both lists are capped the dedupe work is moot.
+        if len(opportunities) >= 12 and len(risks) >= 12:
+            continue
+        if is_new_format:
+            _add_unique_strings(opportunities, opp_seen, summary_obj.get("positive") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("negative") or [], max_items=12)
         else:
-            _add_unique_strings(opportunities, summary_obj.get("bull_case") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("risks") or [], max_items=12)
-            _add_unique_strings(risks, summary_obj.get("bear_case") or [], max_items=12)
+            _add_unique_strings(opportunities, opp_seen, summary_obj.get("bull_case") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("risks") or [], max_items=12)
+            _add_unique_strings(risks, risk_seen, summary_obj.get("bear_case") or [], max_items=12)
 
+    # Top 10 by count (ties alphabetical) without sorting every ticker.
+    top = heapq.nsmallest(10, ticker_counts.items(), key=lambda kv: (-kv[1], kv[0]))
     movers = [
         {
             "symbol": sym,
             "direction": "mixed",
-            "reason": f"Mentioned in {ticker_counts[sym]} ticker summaries",
+            "reason": f"Mentioned in {count} ticker summaries",
         }
-        for sym in sorted(ticker_counts, key=lambda s: (-ticker_counts[s], s))[:10]
+        for sym, count in top
     ]
 
     return {
         "id": market_date.isoformat(),
         "market_date": market_date.isoformat(),
         "title": f"Market Summary — {market_date.isoformat()}",
-        "summary_markdown": "\n".join(md_lines).strip(),
+        "summary_markdown": buf.getvalue().strip(),
         "movers": movers,
         "risks": risks,
         "opportunities": opportunities,
@@ -187,29 +228,102 @@ def _derive_daily_summary(*, market_date: date, rows: list[dict[str, Any]]) -> d
         "sentiment_score": None,
         "sentiment_reason": "",
         "model": "derived-from-summaries",
-        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "generated_at": now_iso or datetime.now(timezone.utc).isoformat(),
     }
 
 
-def main() -> None:
-    configure_logging()
+async def _extract_with_semantic_cache(
+    extractor: TickerTopicService,
+    embedder: EmbeddingService,
+    semantic_cache: SemanticCache,
+    texts: list[str],
+    *,
+    max_concurrency: int,
+    batch_size: int,
+) -> list[ExtractionResult]:
+    """Extract chunks, reusing results for near-duplicates of already-extracted text.
+
+    Chunks are matched against earlier videos (`semantic_cache`) and against each other
+    within this call; only the remaining representatives are sent to the LLM.
+    """
+
+    vectors = await asyncio.to_thread(embedder.embed_texts, texts, batch_size=batch_size)
+
+    results: list[ExtractionResult | None] = [None] * len(texts)
+    representatives = SemanticCache(threshold=semantic_cache.threshold)
+    aliases: dict[int, int] = {}
+    to_extract: list[int] = []
+    for i, vector in enumerate(vectors):
+        hit = semantic_cache.lookup(vector)
+        if hit is not None:
+            results[i] = extractor.with_regex_tickers(hit, texts[i])
+            continue
+        rep = representatives.lookup(vector)
+        if rep is not None:
+            aliases[i] = rep
+            continue
+        representatives.add(vector, i)
+        to_extract.append(i)
+
+    # Lookups and inserts happen on the event loop thread, so concurrent videos never
+    # mutate `semantic_cache` at the same time.
+    extracted = await extractor.aextract_batch([texts[i] for i in to_extract], max_concurrency=max_concurrency)
+    for i, er in zip(to_extract, extracted):
+        results[i] = er
+        # Don't spread regex-only fallbacks (failed LLM calls) to similar chunks.
+        if any(p.positive_keypoints or p.negative_keypoints or p.neutral_keypoints for p in er.ticker_topic_pairs):
+            semantic_cache.add(vectors[i], er)
+    for i, rep in aliases.items():
+        # Reused keypoints, but this chunk's own $TICKER mentions are kept.
+        rep_result = results[rep]
+        results[i] = extractor.with_regex_tickers(rep_result, texts[i]) if rep_result is not None else None
+
+    if to_extract or aliases:
+        logger.debug(
+            "Semantic cache: chunks=%d llm=%d reused=%d",
+            len(texts),
+            len(to_extract),
+            len(texts) - len(to_extract),
+        )
+    return [r or ExtractionResult() for r in results]
+
+
+async def _main_async() -> None:
     settings = get_settings()
 
-    db = SupabaseDB(url=settings.supabase_url, service_key=settings.supabase_key)
+    db = SupabaseDB(
+        url=settings.supabase_url,
+        service_key=settings.supabase_key,
+        half_precision_embeddings=settings.embedding_store_half,
+    )
+
+    cache = SqliteCache(settings.cache_path) if settings.cache_path else None
 
-    youtube = YouTubeService(api_key=settings.youtube_api_key)
+    youtube = YouTubeService(api_key=settings.youtube_api_key, cache=cache)
     transcript = TranscriptService()
     chunker = ChunkingService(window_seconds=settings.chunk_window_seconds)
 
+    # One budget for both services: they share the account's per-model limits.
+    llm_limiter = RateLimiter(
+        requests_per_minute=settings.openai_requests_per_minute,
+        tokens_per_minute=settings.openai_tokens_per_minute,
+        model=settings.openai_chat_model,
+        completion_tokens=settings.openai_completion_tokens,
+    )
     extractor = TickerTopicService(
         openai_api_key=settings.openai_api_key,
         model=settings.openai_chat_model,
         temperature=settings.llm_temperature,
+        cache=cache,
+        rate_limiter=llm_limiter,
+        structured_outputs=settings.openai_structured_outputs,
+        universe=load_ticker_universe(settings.ticker_universe_path) if settings.ticker_universe_path else None,
     )
     summarizer = SummarizationService(
         openai_api_key=settings.openai_api_key,
         model=settings.openai_chat_model,
         temperature=settings.llm_temperature,
+        rate_limiter=llm_limiter,
     )
 
     embedder = EmbeddingService(
@@ -217,6 +331,13 @@ def main() -> None:
         model_name=settings.hf_embedding_model,
         device=settings.embedding_device,
         max_length=settings.embedding_max_length,
+        cache=cache,
+        near_duplicate_bits=settings.embedding_near_duplicate_bits,
+        server_url=settings.embedding_server_url or None,
+    )
+
+    semantic_cache = (
+        SemanticCache(threshold=settings.semantic_cache_threshold) if settings.semantic_cache_threshold > 0 else None
     )
 
     # 1) Daily discovery
@@ -226,7 +347,7 @@ def main() -> None:
         if q.strip()
     ]
 
-    videos = youtube.discover_daily_videos(
+    videos = await youtube.discover_daily_videos_async(
         queries,
         lookback_hours=settings.discovery_lookback_hours,
         max_videos=settings.discovery_max_videos,
@@ -238,39 +359,157 @@ def main() -> None:
     logger.info("Discovered video_ids=%s", [video.video_id for video in videos])
 
     run_started = datetime.now(timezone.utc)
+    run_iso = run_started.isoformat()
     processed = 0
     skipped = 0
     no_transcript = 0
 
+    # One query for every discovered id instead of one round trip per video.
+    already_processed = db.get_processed_video_ids([video.video_id for video in videos])
+    pending_videos = []
     for video in videos:
-        if db.is_video_processed(video.video_id):
+        if video.video_id in already_processed:
             logger.info("Skip already processed video_id=%s", video.video_id)
             skipped += 1
             continue
+        pending_videos.append(video)
+
+    # Optional offline pass: extract every uncached chunk of the run in one Batch API job so
+    # the per-video extraction below is served from the cache. The job needs every chunk up
+    # front, so only this mode prefetches all transcripts before processing starts.
+    transcripts: dict[str, list[TranscriptEntry]] = {}
+    chunks_by_video: dict[str, list[TranscriptChunk]] = {}
+    if settings.openai_batch_api:
+        transcripts = await asyncio.to_thread(
+            transcript.fetch_transcripts,
+            [video.video_id for video in pending_videos],
+            languages=[settings.discovery_language],
+            max_workers=settings.transcript_fetch_concurrency,
+        )
+        chunks_by_video = {
+            video.video_id: chunker.chunk_by_time(video.video_id, transcripts[video.video_id])
+            for video in pending_videos
+            if transcripts.get(video.video_id)
+        }
+        prefetched = await asyncio.to_thread(
+            extractor.prefetch_with_batch_api,
+            [chunk.chunk_text for chunks in chunks_by_video.values() for chunk in chunks],
+            timeout_seconds=settings.openai_batch_timeout_seconds,
+        )
+        logger.info("Batch API prefetch cached %d chunk extractions", prefetched)
+
+    # Videos are independent; process a few at once so one video's LLM/DB round trips
+    # overlap with another's. Sync clients run in worker threads via `asyncio.to_thread`.
+    video_sem = asyncio.Semaphore(max(1, settings.pipeline_video_concurrency))
+    # 3) Transcript fetching, per video and network-bound: fetches run ahead of (and overlap)
+    # other videos' processing, so each video starts as soon as its own transcript arrives.
+    transcript_sem = asyncio.Semaphore(max(1, settings.transcript_fetch_concurrency))
+    # Per-video constants, read once rather than on every video/row.
+    llm_concurrency = settings.llm_concurrency
+    embedding_batch_size = settings.embedding_batch_size
+    llm_model_label = f"llm:{settings.openai_chat_model}"
+
+    # Videos whose writes all landed; marked processed in one update after the loop.
+    processed_ids: list[str] = []
+    # (video_id, published_at, text) per summarized video; None marks the end of the run.
+    embed_queue: asyncio.Queue[tuple[str, datetime, str] | None] = asyncio.Queue()
+
+    async def embed_worker() -> None:
+        """Embed/store per-video summaries while other videos are still in LLM/DB work.
+
+        Each pass drains everything queued so far into one batched forward + one bulk upsert.
+        """
+
+        done = False
+        while not done:
+            batch = [await embed_queue.get()]
+            while not embed_queue.empty():
+                batch.append(embed_queue.get_nowait())
+            items = [item for item in batch if item is not None]
+            done = len(items) != len(batch)
+            if not items:
+                continue
+            try:
+                vectors = await asyncio.to_thread(
+                    embedder.embed_texts,
+                    [text for _, _, text in items],
+                    batch_size=embedding_batch_size,
+                    near_duplicates=True,
+                )
+                # The stored dimension is read off each vector (cached vectors may mean the
+                # model never loads).
+                await asyncio.to_thread(
+                    db.upsert_video_summary_embeddings,
+                    model=settings.hf_embedding_model,
+                    items=[
+                        (video_id, published_at, video_vector)
+                        for (video_id, published_at, _), video_vector in zip(items, vectors)
+                        if video_vector
+                    ],
+                )
+            except Exception:
+                logger.exception("Failed to embed/store video summary embeddings")
+
+    async def fetch_entries(video: VideoMetadata) -> list[TranscriptEntry]:
+        if video.video_id in transcripts:
+            return transcripts.pop(video.video_id)
+        async with transcript_sem:
+            return await asyncio.to_thread(
+                transcript.fetch_transcript, video.video_id, languages=[settings.discovery_language]
+            )
+
+    async def process_video(
+        video: VideoMetadata,
+        entries: list[TranscriptEntry],
+        pending_writes: list[asyncio.Task[None]],
+    ) -> None:
+        nonlocal processed, no_transcript
+
+        # Chunk-level rows only feed the UI/backfills, never the steps below (those use the
+        # in-memory rows), so their upserts run in the background while the LLM calls
+        # proceed. They must land before any summary row is written: the next run skips
+        # videos with a summary, so a failed chunk write has to fail the video before that.
+        async def mark_processed() -> None:
+            await asyncio.gather(*pending_writes)
+            processed_ids.append(video.video_id)
 
         logger.info("Processing video_id=%s title=%s", video.video_id, video.title)
 
-        # 3) Transcript fetching
-        entries = transcript.fetch_transcript(video.video_id, languages=[settings.discovery_language])
         if not entries:
             logger.info("Skipping video with missing transcript: %s", video.video_id)
             # Mark processed to remain idempotent and avoid daily re-tries.
-            db.mark_video_processed(video.video_id)
+            processed_ids.append(video.video_id)
             no_transcript += 1
-            continue
+            return
 
-        # Only persist the video if we're actually going to process it.
+        # Only persist videos we're actually going to process (i.e. that have a transcript).
         # This avoids inserting non-English/unsupported videos that lack an English transcript.
-        db.upsert_video(video)
+        # Chunk and summary rows reference this row, so it is written before any of them.
+        await asyncio.to_thread(db.upsert_video, video)
 
         # 4) Time-based chunking
-        chunks = chunker.chunk_by_time(video.video_id, entries)
-        db.upsert_transcript_chunks(chunks)
+        chunks = chunks_by_video.pop(video.video_id, None) or await asyncio.to_thread(
+            chunker.chunk_by_time, video.video_id, entries
+        )
+        pending_writes.append(asyncio.create_task(asyncio.to_thread(db.upsert_transcript_chunks, chunks)))
 
         # 5) Extract tickers from EACH chunk with categorized keypoints
-        total_extractions = 0
-        for chunk in chunks:
-            chunk_extraction = extractor.extract(chunk.chunk_text)
+        chunk_rows: list[dict[str, Any]] = []
+        # Grouped in memory as rows are built, so there is no need to read chunk_analysis back.
+        grouped: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        chunk_texts = [chunk.chunk_text for chunk in chunks]
+        if semantic_cache is not None:
+            extractions = await _extract_with_semantic_cache(
+                extractor,
+                embedder,
+                semantic_cache,
+                chunk_texts,
+                max_concurrency=llm_concurrency,
+                batch_size=embedding_batch_size,
+            )
+        else:
+            extractions = await extractor.aextract_batch(chunk_texts, max_concurrency=llm_concurrency)
+        for chunk, chunk_extraction in zip(chunks, extractions):
             if not chunk_extraction.ticker_topic_pairs:
                 logger.debug("No tickers in chunk %d for video_id=%s", chunk.chunk_index, video.video_id)
                 continue
@@ -289,7 +528,8 @@ def main() -> None:
 
             # 6) Store one analysis row per (chunk, ticker) with keypoints
             for pair in valid_pairs:
-                ticker = pair.ticker
+                # Normalized once here; `grouped` keys and chunk rows share it downstream.
+                ticker = pair.ticker.strip().upper()
 
                 # Build keypoints structure
                 keypoints = {
@@ -298,20 +538,27 @@ def main() -> None:
                     "neutral": pair.neutral_keypoints,
                 }
 
-                total_extractions += 1
+                grouped[ticker].append(keypoints)
 
-                db.upsert_chunk_analysis(
-                    video_id=video.video_id,
-                    chunk_index=chunk.chunk_index,
-                    ticker=ticker,
-                    chunk_summary=keypoints,
+                chunk_rows.append(
+                    {
+                        "video_id": video.video_id,
+                        "chunk_index": chunk.chunk_index,
+                        "ticker": ticker,
+                        "chunk_summary": keypoints,
+                    }
                 )
 
+        # One bulk upsert per video instead of one request per (chunk, ticker).
+        pending_writes.append(asyncio.create_task(asyncio.to_thread(db.upsert_chunk_analyses, chunk_rows)))
+
+        # One row per extracted (chunk, ticker).
+        total_extractions = len(chunk_rows)
         if total_extractions == 0:
             logger.info("No tickers extracted from any chunk for video_id=%s, skipping", video.video_id)
-            db.mark_video_processed(video.video_id)
+            await mark_processed()
             processed += 1
-            continue
+            return
 
         logger.info(
             "Extracted %d total tickers across all chunks for video_id=%s",
@@ -319,89 +566,88 @@ def main() -> None:
             video.video_id
         )
 
-        # 7) Aggregation: group chunk keypoints by (video_id, ticker)
-        analysis_rows = db.list_chunk_analysis(video.video_id)
-
-        # Group by ticker
-        grouped: dict[str, list[dict[str, Any]]] = defaultdict(list)
-        for row in analysis_rows:
-            ticker_value = row.get("ticker")
-            keypoints = row.get("chunk_summary") or {}
-
-            if ticker_value:
-                ticker = str(ticker_value).upper()
-                grouped[ticker].append(keypoints)
-            else:
-                logger.debug(
-                    "Skipping malformed chunk_analysis row: ticker=%s",
-                    ticker_value,
-                )
-
+        # 7) Aggregation: chunk keypoints were already grouped by ticker during extraction.
         if not grouped:
             logger.info("No ticker groups created for video_id=%s", video.video_id)
-            db.mark_video_processed(video.video_id)
+            await mark_processed()
             processed += 1
-            continue
-
-        # 8) Aggregate keypoints and create embeddings
-        dimension = embedder.embedding_dimension()
+            return
 
+        # 8) Aggregate keypoints
         aggregated_items_for_video: list[dict[str, Any]] = []
 
-        # Aggregate ONCE per video (LLM), producing per-ticker aggregates.
-        # This is much cheaper than calling the LLM once per ticker.
-        aggregated_by_ticker: dict[str, dict[str, Any]] = {}
+        # Aggregate + summarize ONCE per video (single LLM call), producing per-ticker aggregates
+        # and the overall video summary. Falls back to the two-step path for whatever is missing.
+        agg_map: dict[str, AggregatedSummary] = {}
+        combined_overall = None
         try:
-            agg_map = summarizer.aggregate_video_tickers(grouped_chunk_summaries=grouped)
-            aggregated_by_ticker = {t: a.model_dump() for t, a in (agg_map or {}).items()}
+            agg_map, combined_overall = await summarizer.asummarize_video_combined(
+                grouped_chunk_summaries=grouped,
+                title=video.title,
+                channel=video.channel,
+            )
+            if not agg_map:
+                agg_map = await asyncio.to_thread(
+                    summarizer.aggregate_video_tickers, grouped_chunk_summaries=grouped
+                )
         except Exception:
             logger.exception("Failed video-level aggregation; falling back to deterministic aggregation")
 
+        summaries_by_ticker: dict[str, dict[str, Any]] = {}
         for ticker, keypoints_list in grouped.items():
-            ticker_u = str(ticker).strip().upper()
-
-            aggregated_keypoints = aggregated_by_ticker.get(ticker_u)
-            if not aggregated_keypoints:
+            aggregated = (agg_map or {}).get(ticker)
+            if aggregated is not None:
+                # Dumped once, and only for tickers this video actually has.
+                aggregated_keypoints = aggregated.model_dump()
+            else:
                 # Deterministic fallback (dedupe/limit) if LLM output is missing/invalid.
                 aggregated_keypoints = _aggregate_keypoints(keypoints_list)
 
+            summaries_by_ticker[ticker] = aggregated_keypoints
             aggregated_items_for_video.append(
                 {
-                    "ticker": ticker_u,
+                    "ticker": ticker,
                     "summary": aggregated_keypoints,
                 }
             )
 
-            db.upsert_aggregated_summary(
-                video_id=video.video_id,
-                published_at=video.published_at,
-                ticker=ticker_u,
-                aggregated_summary=aggregated_keypoints,
-            )
+        await asyncio.gather(*pending_writes)
+        await asyncio.to_thread(
+            db.upsert_aggregated_summaries,
+            video_id=video.video_id,
+            published_at=video.published_at,
+            summaries=summaries_by_ticker,
+        )
 
         # 9) Store an overall per-video summary for the UI (optional table)
         try:
-            # Cheaper overall summary: use already-generated aggregated summaries.
-            overall = summarizer.summarize_video_overall_from_aggregates(
-                title=video.title,
-                channel=video.channel,
-                aggregated_items=aggregated_items_for_video,
-            )
+            overall = combined_overall
+            if overall is None or not overall.summary_markdown.strip():
+                # Cheaper overall summary: use already-generated aggregated summaries.
+                overall = await asyncio.to_thread(
+                    summarizer.summarize_video_overall_from_aggregates,
+                    title=video.title,
+                    channel=video.channel,
+                    aggregated_items=aggregated_items_for_video,
+                )
 
             if overall.summary_markdown.strip():
                 summary_markdown = overall.summary_markdown
                 key_points = overall.key_points
-                derived_tickers = [
-                    str(x.get("ticker")).strip().upper()
-                    for x in (aggregated_items_for_video or [])
-                    if isinstance(x, dict) and x.get("ticker")
-                ]
-                tickers = sorted({t.strip().upper() for t in (overall.tickers or derived_tickers) if t and t.strip()})
+                # Aggregated items already carry stripped, upper-cased tickers; only read
+                # them when the LLM returned none.
+                ticker_set: set[str] = set()
+                for t in overall.tickers or [item["ticker"] for item in aggregated_items_for_video]:
+                    t = t.strip().upper() if t else ""
+                    if t:
+                        ticker_set.add(t)
+                tickers = sorted(ticker_set)
                 sentiment = overall.sentiment
-                events = [e.model_dump() for e in (overall.events or [])]
-                movers = [m.model_dump() for m in (getattr(overall, "movers", None) or [])]
+                events = _VIDEO_EVENTS_ADAPTER.dump_python(overall.events, mode="json")
+                movers = _VIDEO_MOVERS_ADAPTER.dump_python(overall.movers, mode="json")
 
-                db.upsert_video_summary(
+                await asyncio.to_thread(
+                    db.upsert_video_summary,
                     video_id=video.video_id,
                     video_titles=video.title,
                     published_at=video.published_at,
@@ -413,55 +659,59 @@ def main() -> None:
                     key_points=key_points,
                     sentiment=sentiment,
                     events=events,
-                    model=f"llm:{settings.openai_chat_model}",
+                    model=llm_model_label,
                 )
 
-                # Embed the overall per-video summary (for semantic search over videos).
+                # Queue the overall per-video summary for embedding (semantic search over videos).
                 try:
-                    video_embed_text = "\n\n".join(
-                        [
-                            f"Title: {video.title}",
-                            f"Channel: {video.channel}",
-                            f"Published at: {video.published_at}",
-                            f"overall_explanation: {overall.overall_explanation}",
-                            "Opportunities:\n"
-                            + "\n".join(f"- {x}" for x in (overall.opportunities or []) if str(x).strip()),
-                            "Risks:\n" + "\n".join(f"- {x}" for x in (overall.risks or []) if str(x).strip()),
-                            "Events:\n"
-                            + "\n".join(
-                                f"- {e.description} ({e.date or e.timeframe or 'unspecified'})"
-                                for e in (overall.events or [])
-                                if getattr(e, "description", "") and str(getattr(e, "description", "")).strip()
-                            ),
-                            f"Tickers: {', '.join(tickers) if tickers else '(none)'}",
-                            "Key points:\n" + "\n".join(f"- {x}" for x in key_points if str(x).strip()),
-                            "Summary:\n" + summary_markdown,
-                        ]
-                    ).strip()
-                    video_vector = embedder.embed_text(video_embed_text)
-                    db.upsert_video_summary_embedding(
-                        video_id=video.video_id,
-                        published_at=video.published_at,
-                        model=settings.hf_embedding_model,
-                        embedding=video_vector,
-                        dimension=dimension,
-                    )
+                    # Only non-empty sections are embedded: empty headers are pure token cost.
+                    parts = [
+                        f"Title: {video.title}",
+                        f"Channel: {video.channel}",
+                        f"Published at: {video.published_at}",
+                    ]
+                    if overall.overall_explanation.strip():
+                        parts.append(f"overall_explanation: {overall.overall_explanation}")
+                    opp_bullets = [f"- {x}" for x in (overall.opportunities or []) if str(x).strip()]
+                    risk_bullets = [f"- {x}" for x in (overall.risks or []) if str(x).strip()]
+                    event_bullets = [
+                        f"- {e.description} ({e.date or e.timeframe or 'unspecified'})"
+                        for e in (overall.events or [])
+                        if e.description.strip()
+                    ]
+                    key_point_bullets = [f"- {x}" for x in key_points if str(x).strip()]
+                    if opp_bullets:
+                        parts.append("Opportunities:\n" + "\n".join(opp_bullets))
+                    if risk_bullets:
+                        parts.append("Risks:\n" + "\n".join(risk_bullets))
+                    if event_bullets:
+                        parts.append("Events:\n" + "\n".join(event_bullets))
+                    parts.append(f"Tickers: {', '.join(tickers) if tickers else '(none)'}")
+                    if key_point_bullets:
+                        parts.append("Key points:\n" + "\n".join(key_point_bullets))
+                    # summary_markdown restates the bullets above; only embed it when they are empty.
+                    if not (opp_bullets or risk_bullets or key_point_bullets):
+                        parts.append("Summary:\n" + summary_markdown)
+                    video_embed_text = "\n\n".join(parts).strip()
+                    await embed_queue.put((video.video_id, video.published_at, video_embed_text))
                 except Exception:
-                    logger.exception("Failed to embed/store video summary embedding")
+                    logger.exception("Failed to build video summary embedding text")
             else:
                 # Fallback to derived-from-summaries (keeps UI populated even if LLM fails).
                 logger.info("Falling back to derived video summary video_id=%s", video.video_id)
-                sr2 = (
+                sr2_resp = await asyncio.to_thread(
                     db.client.table("summaries")
-                    .select("ticker,summary,created_at")
+                    .select("ticker,summary")
                     .eq("video_id", video.video_id)
                     .order("created_at", desc=True)
                     .limit(500)
-                    .execute()
-                ).data or []
-                vs = _derive_video_summary(video_id=video.video_id, summary_rows=sr2)
+                    .execute
+                )
+                sr2 = sr2_resp.data or []
+                vs = _derive_video_summary(video_id=video.video_id, summary_rows=sr2, now_iso=run_iso)
                 if vs is not None:
-                    db.upsert_video_summary(
+                    await asyncio.to_thread(
+                        db.upsert_video_summary,
                         video_id=video.video_id,
                         video_titles=video.title,
                         published_at=video.published_at,
@@ -479,9 +729,35 @@ def main() -> None:
         except Exception:
             logger.exception("Failed to store video summary")
 
-        db.mark_video_processed(video.video_id)
+        await mark_processed()
         processed += 1
-        # Continue to next discovered video.
+
+    async def handle_video(video: VideoMetadata) -> None:
+        pending_writes: list[asyncio.Task[None]] = []
+        try:
+            # Fetched outside `video_sem`: transcripts keep arriving while earlier videos
+            # are still in LLM/DB work.
+            entries = await fetch_entries(video)
+            async with video_sem:
+                await process_video(video, entries, pending_writes)
+        except Exception:
+            # Not marked processed, so the next run retries it.
+            logger.exception("Failed to process video_id=%s", video.video_id)
+        finally:
+            # Settle background writes of a failed video too (they are idempotent upserts).
+            await asyncio.gather(*pending_writes, return_exceptions=True)
+
+    embed_task = asyncio.create_task(embed_worker())
+    await asyncio.gather(*[handle_video(video) for video in pending_videos])
+    await embed_queue.put(None)
+    await embed_task
+
+    # `processed_at` is informational (skips key off video_summaries.summarized_at), so it
+    # is stamped once for the whole run instead of one update per video.
+    try:
+        await asyncio.to_thread(db.mark_videos_processed, processed_ids)
+    except Exception:
+        logger.exception("Failed to mark %d videos processed", len(processed_ids))
 
     # 10) Store an overall daily summary for the UI (optional table)
     try:
@@ -497,11 +773,10 @@ def main() -> None:
 
         # Prefer LLM daily summary from per-video summaries (or fall back to derived from aggregated summaries).
         # Run-based ("what we processed today"): filter by summarized_at within the EST day window.
+        # Only the fields the daily prompt reads; filtering/ordering on summarized_at stays server-side.
         vs_resp = (
             db.client.table("video_summaries")
-            .select(
-                "video_id,video_titles,published_at,overall_explanation,risks,opportunities,key_points,summarized_at"
-            )
+            .select("video_id,video_titles,overall_explanation,risks,opportunities,key_points")
             .gte("summarized_at", start)
             .lte("summarized_at", end)
             .order("summarized_at", desc=True)
@@ -555,24 +830,26 @@ def main() -> None:
                     title=daily.title,
                     overall_summarize=getattr(daily, "overall_summarize", "") or "",
                     summary_markdown=daily.summary_markdown,
-                    movers=[m.model_dump() for m in daily.movers],
+                    movers=_DAILY_MOVERS_ADAPTER.dump_python(daily.movers, mode="json"),
                     risks=daily.risks,
                     opportunities=daily.opportunities,
                     sentiment=getattr(daily, "sentiment", None),
                     sentiment_score=getattr(daily, "sentiment_score", None),
                     sentiment_reason=getattr(daily, "sentiment_reason", "") or "",
-                    model=f"llm:{settings.openai_chat_model}",
+                    model=llm_model_label,
                 )
             else:
                 s_resp = (
                     db.client.table("summaries")
-                    .select("video_id,ticker,summary,created_at")
+                    .select("video_id,ticker,summary")
                     .in_("video_id", video_ids)
                     .order("created_at", desc=True)
                     .limit(4000)
                     .execute()
                 )
-                ds = _derive_daily_summary(market_date=market_date, rows=(s_resp.data or []))
+                ds = _derive_daily_summary(
+                    market_date=market_date, rows=(s_resp.data or []), now_iso=run_iso
+                )
                 if ds is not None:
                     db.upsert_daily_summary(
                         market_date=market_date,
@@ -599,5 +876,10 @@ def main() -> None:
     )
 
 
+def main() -> None:
+    configure_logging()
+    asyncio.run(_main_async())
+
+
 if __name__ == "__main__":
     main()